@@ -1,26 +1,269 @@
+from collections.abc import Iterator
+import contextlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import errno
+import fnmatch
+import functools
+import hashlib
+import heapq
+import io
+import json
+import mmap
+import os
 from pathlib import Path
+import queue
+import re
 import shutil
+import sqlite3
+import stat
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl                                                        # only used for reflinks, which are only on Linux anyway
+except ImportError:
+    fcntl = None
+try:
+    import zstandard                                                    # only used for zstd compressed archives
+except ImportError:
+    zstandard = None
+
+
+_LARGE_FILE_SIZE = 8 * 1024**2                                          # files at least this many bytes are copied/moved by themselves when using multiple workers
+_BATCH_FILES = 64                                                       # the maximum number of smaller files to copy/move together in a batch
+_BATCH_BYTES = 8 * 1024**2                                              # the maximum total bytes of smaller files to copy/move together in a batch
+_COPY_BUFFER_SIZE = 4 * 1024**2                                         # the buffer size for copying file data in userspace (and the minimum chunk size for copying it in the kernel)
+_FICLONE = 0x40049409                                                   # the Linux ioctl request code to reflink (clone) a file
+_HASH_ALGORITHM = 'sha256'                                              # the default hashlib algorithm for hashing files
+_HASH_BUFFER_SIZE = 1024**2                                             # the buffer size for reading smaller files to hash them
+_MMAP_MIN_SIZE = 64 * 1024**2                                           # files at least this many bytes are memory mapped to hash them
+_HASH_CACHE_PATH = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'file_tools' / 'hashes.sqlite'
+_MANIFEST_NAME = '.file_tools_manifest.sqlite'                          # the name of the manifest file stored in destination directories for the 'update' exists action
+_JOURNAL_NAME = '.file_tools_journal.jsonl'                             # the name of the journal file stored in destination directories while copying/moving into them
+_JOURNAL_FLUSH = 256                                                    # the number of finished paths to write to the journal at a time
+_TEMP_SUFFIX = '.file_tools_part'                                       # the suffix of the temporary files which files are copied to, before they're renamed to their destination
+_COPY_NUM_REGEX = re.compile(r'^(.*)\((\d+)\)$')                       # matches a path stem which ends with a '(#)' copy number
+_N_CONFLICTS_SHOWN = 20                                                 # the maximum number of existing file paths to list when asking what to do with them
+_UNSUPPORTED_ERRNOS = {errno.EINVAL, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EXDEV, errno.ENOTTY, errno.EBADF, errno.ETXTBSY}
+_copy_file_range = (lambda src_fd, dst_fd, offset, count: os.copy_file_range(src_fd, dst_fd, count, offset)) if hasattr(os, 'copy_file_range') else None
+_sendfile = (lambda src_fd, dst_fd, offset, count: os.sendfile(dst_fd, src_fd, offset, count)) if hasattr(os, 'sendfile') else None
+_OUTPUT_MODES = ('text', 'quiet', 'json')
+_PROGRESS_RATE = 10                                                     # the maximum number of times per second to redraw the progress bar
+_N_SLOWEST = 10                                                         # the number of slowest files to keep track of
+_DIR_FD_SUPPORTED = ({os.open, os.unlink, os.rmdir} <= os.supports_dir_fd) and (os.scandir in os.supports_fd)  # whether paths can be deleted relative to directory file descriptors
+_O_DIR_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0) | getattr(os, 'O_CLOEXEC', 0)
+_DELETE_SPLIT_DEPTH = 3                                                 # the maximum depth of directories to split into separate subtrees to delete in parallel
+_TAR_COMPRESSIONS = ('auto', 'none', 'gzip', 'zstd')
+_GZIP_LEVEL = 6                                                         # the compression level for gzip compressed archives
+_ZSTD_LEVEL = 3                                                         # the compression level for zstd compressed archives
+_PIPELINE_DEPTH = 16                                                    # the maximum number of chunks waiting between each stage of packing an archive
 
 
 #--------- Support Functions ---------#
 
-def _path_parts_valid(a_path:Path, include:list=[], exclude:list=[]) -> bool:
-    """Determine if all of the individual parts in a path match none of the `exclude` 
-    glob patterns first (if exclusions provided), and then at least one of the `include` 
-    patterns (if provided). Return True if this is case, otherwise False."""
-    if not include and not exclude:
-        return True                                                     # if neither inclusions nor exclusions were provided, then immediately return True 
-    for part in a_path.parts:
-        for pattern in exclude:                                         # if no exclusions are provided, this won't do anything, and go straight to checking inclusions
-            if Path(part).match(pattern):
-                return False                                            # if any parts match any of the exclusion patterns, return False
-    if not include:                                                     
-        return True                                                     # if there were no exclusion matches, but no inclusions are provided, then return True
-    for part in a_path.parts:
-        for pattern in include:
-            if Path(part).match(pattern):
-                return True                                             # if matches matches *any* of the inclusion patterns, return True
-    return False                                                        # but if not at least one inclusion matches, then return False
+class _Reporter:
+    """Handles all of the terminal output of an operation (such as "copy"), and collects metrics about it.
+
+    The `output` mode can be one of the following:
+        - 'text' - print messages and each path as it's done (the default).
+        - 'quiet' - only print messages, and show a progress bar (on stderr) instead of each path, 
+        which is only redrawn up to `_PROGRESS_RATE` times per second.
+        - 'json' - print everything as an NDJSON stream of events (one JSON object per line), ending 
+        with a "summary" event of all the metrics.
+    If `stats` is True, then a summary of the metrics is also printed at the end (in 'text'/'quiet' mode).
+
+    The metrics are the time spent in each phase, counts (such as paths, bytes, and calls which touch the 
+    filesystem), and the slowest files. Counts can be added from any thread."""
+    def __init__(self, operation:str='', output:str='text', stats:bool=False):
+        assert output in _OUTPUT_MODES, f'"{output}" is not a valid output mode. Must be one of: {_OUTPUT_MODES}'
+        self.operation, self.output, self.stats = operation, output, stats
+        self.timing = stats or (output == 'json')                       # whether any (more expensive) timing metrics should be collected
+        self.start = time.perf_counter()
+        self.phases, self.counts = {}, {}
+        self.slowest = []                                               # a min-heap of tuples of the seconds and path of each of the slowest files
+        self.n_paths, self.total = 0, None                              # the number of paths done so far, and the total number of paths (if known)
+        self.last_progress = 0.0
+        self.lock = threading.Lock()
+
+    def _emit(self, event:dict):
+        print(json.dumps(event), flush=True)
+
+    def message(self, text:str):
+        """Output a general message."""
+        if self.output == 'json':
+            self._emit({'event': 'message', 'text': text.strip()})
+        else:
+            self._clear_progress()
+            print(text)
+
+    def ask(self, msg:str) -> str:
+        """Prompt the user with the message `msg`, and return what they enter. In 'json' mode, the prompt 
+        is written to stderr instead, so that the NDJSON stream stays valid."""
+        if self.output == 'json':
+            self._clear_progress()
+            sys.stderr.write(f'{msg}\n> ')
+            sys.stderr.flush()
+            return input()
+        self.message(msg)
+        return input('> ')
+
+    def path(self, line:str, a_path:Path, is_dir:bool=False, **fields):
+        """Output a single path which was done, where `line` is its text (for 'text' mode), and 
+        any other `fields` are added to its event (for 'json' mode)."""
+        self.count('dirs' if is_dir else 'files')
+        self.n_paths += 1
+        if self.output == 'text':
+            print(line)
+        elif self.output == 'json':
+            self._emit({'event': 'path', 'path': str(a_path), 'is_dir': is_dir, **fields})
+        else:
+            self._progress()
+
+    def advance(self, n:int):
+        """Add `n` paths which were done (without outputting each of them)."""
+        self.n_paths += n
+        if self.output == 'quiet':
+            self._progress()
+
+    def error(self, a_path:str|Path, e:Exception|str):
+        """Output an error (or problem) for a single path."""
+        self.count('errors')
+        if self.output == 'json':
+            self._emit({'event': 'error', 'path': str(a_path), 'error': str(e)})
+        else:
+            print(f'    "{a_path}": {e}')
+
+    def count(self, name:str, n:int=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_phase(self, name:str, seconds:float):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name:str):
+        """A context manager which adds the time spent in it to the phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def file_time(self, a_path:Path, seconds:float):
+        """Record how long a single file took, to keep track of the slowest ones."""
+        if not self.timing:
+            return
+        with self.lock:
+            if len(self.slowest) < _N_SLOWEST:
+                heapq.heappush(self.slowest, (seconds, str(a_path)))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, str(a_path)))
+
+    def _progress(self):
+        now = time.perf_counter()
+        if now - self.last_progress < 1 / _PROGRESS_RATE:
+            return                                                      # only redraw the progress bar so often, so it doesn't slow anything down
+        self.last_progress = now
+        elapsed = now - self.start
+        rate_str = f'{self.n_paths / elapsed:,.0f} paths/s  {self.counts.get("bytes", 0) / elapsed / 1e6:,.1f} MB/s'
+        if self.total:
+            done = min(self.n_paths / self.total, 1)
+            bar = '#' * int(done * 30)
+            sys.stderr.write(f'\r[{bar:<30}] {self.n_paths}/{self.total}  {rate_str}  ')
+        else:
+            sys.stderr.write(f'\r{self.n_paths} paths  {rate_str}  ')
+        sys.stderr.flush()
+
+    def _clear_progress(self):
+        if self.last_progress:
+            sys.stderr.write('\r\033[K')                                # clear the progress bar line, so it can be redrawn after anything else is printed
+            sys.stderr.flush()
+            self.last_progress = 0.0
+
+    def summary(self) -> dict:
+        """Return a dict of all of the metrics."""
+        elapsed = time.perf_counter() - self.start
+        return {
+            'operation': self.operation,
+            'elapsed': elapsed,
+            'phases': dict(self.phases),
+            'counts': dict(self.counts),
+            'paths': self.n_paths,
+            'files_per_sec': (self.counts.get('files') or self.n_paths) / elapsed if elapsed else 0.0,
+            'mb_per_sec': self.counts.get('bytes', 0) / elapsed / 1e6 if elapsed else 0.0,
+            'slowest': [{'path': p, 'seconds': t} for t, p in sorted(self.slowest, reverse=True)],
+        }
+
+    def finish(self):
+        """Output the summary of the metrics (if `stats` is True, or in 'json' mode)."""
+        self._clear_progress()
+        if self.output == 'json':
+            self._emit({'event': 'summary', **self.summary()})
+        elif self.stats:
+            summary = self.summary()
+            print(f'\n--- Stats ({self.operation}) ---')
+            print(f'elapsed:    {summary["elapsed"]:.3f} s')
+            print('phases:     ' + (', '.join(f'{name} {t:.3f} s' for name, t in summary['phases'].items()) or '-'))
+            print(f'throughput: {summary["files_per_sec"]:,.1f} files/s, {summary["mb_per_sec"]:,.2f} MB/s')
+            print('counts:     ' + (', '.join(f'{name} {n:,}' for name, n in sorted(summary['counts'].items())) or '-'))
+            if summary['slowest']:
+                print('slowest files:')
+                for item in summary['slowest']:
+                    print(f'    {item["seconds"]:.3f} s  "{item["path"]}"')
+
+_reporter = _Reporter()                                                 # the reporter of the current operation (set by `_reporting()`), which all support functions output through
+
+@contextlib.contextmanager
+def _reporting(operation:str, output:str='text', stats:bool=False):
+    """A context manager which sets a new `_Reporter` for an operation as the current one while in 
+    it, and outputs its summary at the end."""
+    global _reporter
+    previous, _reporter = _reporter, _Reporter(operation, output, stats)
+    try:
+        yield _reporter
+    finally:
+        _reporter.finish()
+        _reporter = previous
+
+class _PathMatcher:
+    """Compiled `include` and `exclude` lists of simple glob patterns, which are applied to each 
+    individual part of a (relative) path. A path is valid if none of its parts match any of the 
+    exclusion patterns, and at least one of its parts matches an inclusion pattern (only if any 
+    inclusions are provided).
+
+    Each list of patterns is translated once into a single combined regex, and the result for each 
+    path part (name) is cached (up to `cache_size` names), as the same names tend to repeat a lot 
+    (such as ".git" or "__init__.py"). Patterns with more than one part (containing a "/") can 
+    never match a single part, so they are ignored (this is the same as `Path(part).match(pattern)`)."""
+    def __init__(self, include:list=[], exclude:list=[], cache_size:int=65536):
+        self.include, self.exclude = list(include), list(exclude)
+        self.is_included = functools.lru_cache(cache_size)(self._compile(include))
+        self.is_excluded = functools.lru_cache(cache_size)(self._compile(exclude))
+
+    @staticmethod
+    def _compile(patterns:list):
+        """Return a function which takes a path part, and returns True if it matches any of the 
+        `patterns` (or always False if there are none)."""
+        for pattern in patterns:
+            assert pattern, 'glob patterns must not be empty'
+        patterns = [pattern for pattern in patterns if not ('/' in pattern or os.sep in pattern)]
+        if not patterns:
+            return lambda part: False
+        flags = re.IGNORECASE if os.name == 'nt' else 0                 # parts are matched case-insensitively on Windows, same as `Path.match()`
+        regex = re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns), flags)
+        return lambda part: regex.match(part) is not None
+
+    def parts_valid(self, parts:tuple) -> bool:
+        """Return True if all of the individual `parts` of a path match none of the exclusion 
+        patterns, and at least one of them matches an inclusion pattern (if any are provided)."""
+        if any(self.is_excluded(part) for part in parts):
+            return False                                                # if any parts match any of the exclusion patterns, return False
+        return (not self.include) or any(self.is_included(part) for part in parts)
 
 def is_dir_empty(a_path:Path) -> bool:
     """Return `True` if `a_path` is an empty directory, and `False` if not"""
@@ -31,71 +274,488 @@ def is_dir_empty(a_path:Path) -> bool:
         return True                                                     # return True if a direectory and is empty
     return False                                                        # return False if not a directory
 
-def _handle_existing_filepath(filepath:Path, exists_action:str="ask") -> Path|None:
-    """Check if the `filepath` exists, and apply the `exisits_action` to it if it does."""
+def _list_dir_names(a_dir:Path) -> tuple[set[str], set[str]]:
+    """Return a set of the names of the files in the directory `a_dir`, and a set of the names of 
+    everything in it (both are empty if it doesn't exist), reading the directory only once."""
+    _reporter.count('scandir')
+    files, names = set(), set()
+    try:
+        with os.scandir(a_dir) as dir_it:
+            for entry in dir_it:
+                names.add(entry.name)
+                if entry.is_file():
+                    files.add(entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files, names
+
+def _get_renamed_path(filepath:Path, taken:set[str]) -> Path:
+    """Return `filepath` with a '(#)' suffix added to its stem (name without file extension), using the 
+    lowest number whose name isn't in the set of `taken` names (which the new name is then added to). 
+    If the stem already ends with a '(#)', then it's replaced, starting from one greater than its number."""
+    stem, copy_num = filepath.stem, 1
+    if match := _COPY_NUM_REGEX.match(stem):
+        stem, copy_num = match[1], int(match[2]) + 1
+    while (name := f'{stem}({copy_num}){filepath.suffix}') in taken:
+        copy_num += 1
+    taken.add(name)
+    return filepath.with_name(name)
+
+def _ask_exists_action(msg:str, actions:tuple[str]) -> str:
+    """Ask the user which of the `actions` to do (with the prompt `msg`) until a valid one is entered, and return it."""
+    while True:
+        i = _reporter.ask(msg).strip().lower()                          # get user input for what to do
+        if i in actions:
+            return i
+
+def _resolve_conflicts(plan:list[tuple[Path, Path, bool]], dst:Path, exists_action:str="ask") -> list[tuple[Path, Path, bool]]:
+    """Find the destination file paths in the `plan` of (source path, destination path, is directory) 
+    tuples which already exist (existing directories are ignored), apply the `exists_action` to them, 
+    and return the new plan. Each destination directory is only read once (and not at all if it doesn't 
+    exist yet), and all of the files are checked against its names, rather than checking each file path.
+    The `exists_action` can be one of the following:
+        - 'ask' - list all of the existing files, and prompt the user once what to do for all of them 
+        (or to choose for each individual file).
+        - 'rename' - keep the existing file and rename the current one (see `_get_renamed_path()`), 
+        using a name which isn't taken in the destination or by any other path in the plan.
+        - 'replace' - delete the existing file, before copying/moving the current file.
+        - 'skip' - don't copy/move this file, skip over it.
+    """
     valid_exists_actions = ('ask', 'rename', 'replace', 'skip')         # check if `exists_action` value is valid:
     assert exists_action in valid_exists_actions, f'"{exists_action}" is not a valid action to handle exisiting files. Must be one of: {valid_exists_actions}'
-    if filepath.is_file():                                              # if the file already exists, then handle it with `exists_action`                                               
-        print(f'\nThe file path "{filepath}" already exisits.')
-        # if the exists action is "ask", ask the user what to do for this file (modify the action based on input):
-        if exists_action == 'ask':
-            msg = 'Enter "rename", "replace", or "skip" to determine what to with this path'
-            while True:
-                print(msg)
-                i = input("> ").strip().lower()                         # get user input for what to do
-                if i in ("rename", "replace", "skip"):
-                    exists_action = i                                   # if a valid action was entered, set action and break loop
-                    break
-        # apply solution to the file:
-        if exists_action == 'rename':                                   # if rename: add '(#)' suffix to path
-            copy_num = 1
-            # if the path stem already ends with a '(#)', then make the copy_num be one greater than that number between the parenthesis:
-            if (filepath.stem[-3] == '(') and (filepath.stem[-1] == ')'):
+    # 1) Find the existing files, reading each destination directory once. As each directory in the plan comes 
+    # before its contents, a directory's parent is always read first, so new directories are never read:
+    listings = {dst.parent: (set(), {dst.name})}                        # the file names and all names in each destination directory (`dst` itself always exists)
+    planned = {}                                                        # the names of the paths in the plan in each destination directory
+    conflicts = []
+    for i, (_, dst_p, is_dir) in enumerate(plan):
+        parent = dst_p.parent
+        if parent not in listings:
+            grandparent_names = listings.get(parent.parent, (None, None))[1]
+            exists = (grandparent_names is None) or (parent.name in grandparent_names)
+            listings[parent] = _list_dir_names(parent) if exists else (set(), set())
+        planned.setdefault(parent, set()).add(dst_p.name)
+        if not is_dir and dst_p.name in listings[parent][0]:
+            conflicts.append(i)
+    if not conflicts:
+        return plan
+    # 2) Ask the user what to do with the existing files (if "ask"):
+    actions = {}
+    if exists_action == 'ask':
+        lines = [f'\n{len(conflicts)} file path(s) already exist in "{dst}":']   # the existing paths are part of the prompt (so they're shown with it in every output mode)
+        lines += [f'    "{plan[i][1].relative_to(dst)}"' for i in conflicts[:_N_CONFLICTS_SHOWN]]
+        if len(conflicts) > _N_CONFLICTS_SHOWN:
+            lines.append(f'    ... and {len(conflicts) - _N_CONFLICTS_SHOWN} more')
+        lines.append('Enter "rename", "replace", or "skip" to apply to all of them, or "each" to choose for each one')
+        exists_action = _ask_exists_action('\n'.join(lines), ('rename', 'replace', 'skip', 'each'))
+        if exists_action == 'each':
+            for i in conflicts:
+                actions[i] = _ask_exists_action(f'\nThe file path "{plan[i][1]}" already exisits.\n'
+                                                'Enter "rename", "replace", or "skip" to determine what to with this path', ('rename', 'replace', 'skip'))
+    # 3) Apply the action to each existing file:
+    new_plan, n_actions = list(plan), {}
+    taken = {}                                                          # the names which are taken in each destination directory (only for renaming)
+    for i in conflicts:
+        action = actions.get(i, exists_action)
+        n_actions[action] = n_actions.get(action, 0) + 1
+        src_p, dst_p, is_dir = plan[i]
+        if action == 'rename':                                          # if rename: add '(#)' suffix to path
+            if dst_p.parent not in taken:
+                taken[dst_p.parent] = listings[dst_p.parent][1] | planned[dst_p.parent]
+            new_plan[i] = (src_p, _get_renamed_path(dst_p, taken[dst_p.parent]), is_dir)
+        elif action == 'skip':
+            new_plan[i] = None                                          # if skip, remove the path from the plan
+        # if replace, do no file operations (would be replaced by any copy or move operations, so no need to do anything)
+    results = {'rename': 'renamed', 'replace': 'replaced', 'skip': 'skipped'}
+    _reporter.message('\nExisting files: ' + ', '.join(f'{n} will be {results[action]}' for action, n in n_actions.items()))
+    return [item for item in new_plan if item]
+
+def _hash_file(a_path:str|Path, algorithm:str=_HASH_ALGORITHM) -> str:
+    """Return the hex digest of the contents of the file `a_path`, using the hashlib `algorithm`. 
+    Files of at least `_MMAP_MIN_SIZE` bytes are memory mapped and hashed in a single call, while 
+    smaller files are read into a reusable buffer. Either way, hashlib releases the GIL while 
+    hashing, so files can be hashed in parallel with threads."""
+    file_hash = hashlib.new(algorithm)
+    with open(a_path, 'rb', buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= _MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                file_hash.update(mm)
+        else:
+            buffer = memoryview(bytearray(_HASH_BUFFER_SIZE))
+            while n := f.readinto(buffer):
+                file_hash.update(buffer[:n])
+    return file_hash.hexdigest()
+
+class _HashCache:
+    """An SQLite database of file hashes, keyed on each file's device, inode, size, and modification 
+    time (and the hash algorithm), so that files which haven't changed don't need to be hashed again. 
+    It's stored in the user's cache directory by default (see `_HASH_CACHE_PATH`)."""
+    def __init__(self, path:Path=None):
+        path = Path(path) if path else _HASH_CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS hashes (dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, algorithm TEXT, hash TEXT, '
+                        'PRIMARY KEY (dev, ino, size, mtime_ns, algorithm))')
+
+    def get(self, st:os.stat_result, algorithm:str) -> str|None:
+        """Return the cached hash for the file with the stats `st`, or None if there isn't one."""
+        row = self.db.execute('SELECT hash FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND algorithm = ?', 
+                              (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm)).fetchone()
+        return row[0] if row else None
+
+    def put(self, st:os.stat_result, algorithm:str, digest:str):
+        self.db.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)', 
+                        (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm, digest))
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+def _hash_files(paths:list[Path], algorithm:str=_HASH_ALGORITHM, workers:int=None, use_cache:bool=True) -> dict[Path, str|OSError]:
+    """Hash all of the files in `paths` with a pool of `workers` threads (or the number of CPUs if not 
+    provided), and return a dict of each path and its hash, or the `OSError` that occurred for it. 
+    If `use_cache` is True, any files with a hash in the `_HashCache` aren't read at all."""
+    workers = workers or os.cpu_count() or 1
+    cache = _HashCache() if use_cache else None
+    hashes, to_hash = {}, []
+    try:
+        for p in paths:
+            try:
+                _reporter.count('stat')
+                st = os.stat(p)
+            except OSError as e:
+                hashes[p] = e
+                continue
+            digest = cache.get(st, algorithm) if cache else None
+            if digest:
+                hashes[p] = digest                                      # if the file hasn't changed since it was last hashed, use the cached hash
+                _reporter.count('hash.cached')
+            else:
+                to_hash.append((p, st))
+        def hash_func(item):
+            start = time.perf_counter()
+            digest = _hash_file(item[0], algorithm)
+            _reporter.file_time(item[0], time.perf_counter() - start)
+            return digest
+        for (p, st), digest, e in _imap_bounded(hash_func, to_hash, workers):
+            hashes[p] = e or digest
+            if not e:
+                _reporter.count('hash.read')
+                _reporter.count('bytes_hashed', st.st_size)
+                if cache:
+                    cache.put(st, algorithm, digest)
+    finally:
+        if cache:
+            cache.close()
+    return hashes
+
+def _verify_pairs(pairs:list[tuple[Path, Path]], algorithm:str=_HASH_ALGORITHM, workers:int=None, 
+                  src_hashes:dict[Path, str|OSError]=None) -> list[tuple[Path, str]]:
+    """Compare the hashes of the (source, destination) file path tuples in `pairs`, and return a list of 
+    tuples of the source path and a description of the problem for each pair which doesn't match (in the 
+    same order as `pairs`). The source hashes can be provided in `src_hashes` (such as if the sources were 
+    hashed before they were moved), otherwise they are hashed along with the destinations."""
+    to_hash = [dst_p for _, dst_p in pairs]
+    if src_hashes == None:
+        to_hash += [src_p for src_p, _ in pairs]
+    hashes = _hash_files(to_hash, algorithm, workers)
+    if src_hashes:
+        hashes.update(src_hashes)
+    problems = []
+    for src_p, dst_p in pairs:
+        src_hash, dst_hash = hashes[src_p], hashes[dst_p]
+        if isinstance(dst_hash, FileNotFoundError):
+            problems.append((src_p, f'"{dst_p}" is missing'))
+        elif isinstance(src_hash, OSError) or isinstance(dst_hash, OSError):
+            problems.append((src_p, f'could not be hashed: {src_hash if isinstance(src_hash, OSError) else dst_hash}'))
+        elif src_hash != dst_hash:
+            problems.append((src_p, f'"{dst_p}" has different contents'))
+    return problems
+
+def _print_verify_problems(problems:list[tuple[Path, str]], n_files:int):
+    """Print the problems returned by `_verify_pairs()` for `n_files` files, or that all files match."""
+    if not problems:
+        _reporter.message(f'\nAll {n_files} file(s) match.')
+        return
+    _reporter.message(f'\n[!] {len(problems)} of {n_files} file(s) do not match:')
+    for src_p, problem in problems:
+        _reporter.error(src_p, problem)
+
+class _SyncManifest:
+    """An SQLite database stored in a destination directory `dst` (as `_MANIFEST_NAME`), which records 
+    the size and modification time (and hash if `checksum` is True) of each file copied/moved into it 
+    with the 'update' exists action, so that only the source files need to be hashed the next time 
+    (if `checksum` is True).
+
+    A source file is unchanged only if the destination file exists and its size and modification time 
+    match the source file's. Each destination directory is only listed once (and the destination file 
+    is only stat'ed if it's there). If `checksum` is True, the hashes of the files must also match 
+    (which means the source files are always read), where the destination file is only read if its 
+    record doesn't match the source file (as its hash was recorded when it was copied/moved).
+
+    If `read_only` is True (such as for a dry run), nothing is written to the manifest, and it's not 
+    created if it doesn't exist yet (or if `dst` doesn't exist)."""
+    def __init__(self, dst:Path, checksum:bool=False, read_only:bool=False):
+        self.dst, self.checksum, self.read_only = dst, checksum, read_only
+        if read_only:
+            path = dst / _MANIFEST_NAME
+            self.db = sqlite3.connect(f'file:{path}?mode=ro', uri=True) if path.is_file() else sqlite3.connect(':memory:')
+        else:
+            self.db = sqlite3.connect(dst / _MANIFEST_NAME)
+        if not read_only:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)')
+        self.pending = {}                                               # the source stats and hashes of each destination path (string) which needs to be copied, to record once it is
+        self.listings = {}                                              # the `os.DirEntry` of each file in each destination directory which has been listed
+        self.n_unchanged = 0
+        self.n_uncommitted = 0
+
+    def is_unchanged(self, src_p:Path, dst_p:Path) -> bool:
+        """Return True if the source file `src_p` is unchanged from the destination file `dst_p`."""
+        src_st = os.stat(src_p)
+        rel_path = dst_p.relative_to(self.dst).as_posix()
+        row = self.db.execute('SELECT size, mtime_ns, hash FROM files WHERE path = ?', (rel_path,)).fetchone()
+        src_hash = _hash_file(src_p) if self.checksum else None
+        dst_st = self._dst_stat(dst_p)
+        unchanged = bool(dst_st) and (dst_st.st_size, dst_st.st_mtime_ns) == (src_st.st_size, src_st.st_mtime_ns)
+        if unchanged and not (row and (row[0], row[1], row[2] if self.checksum else None) == (src_st.st_size, src_st.st_mtime_ns, src_hash)):
+            unchanged = (not self.checksum) or (_hash_file(dst_p) == src_hash)  # if the record doesn't match, check the destination file's contents (if `checksum`)
+            if unchanged:
+                self._write(rel_path, src_st, src_hash)                 # record it, so the destination file won't need to be read next time
+        if unchanged:
+            self.n_unchanged += 1
+            return True
+        self.pending[str(dst_p)] = (src_st, src_hash)
+        return False
+
+    def _dst_stat(self, dst_p:Path) -> os.stat_result|None:
+        """Return the stats of the destination file `dst_p`, or None if it isn't an existing file, listing 
+        its directory the first time it's needed."""
+        parent = str(dst_p.parent)
+        if parent not in self.listings:
+            _reporter.count('scandir')
+            try:
+                with os.scandir(parent) as dir_it:
+                    self.listings[parent] = {entry.name: entry for entry in dir_it if entry.is_file()}
+            except (FileNotFoundError, NotADirectoryError):
+                self.listings[parent] = {}
+        entry = self.listings[parent].get(dst_p.name)
+        if not entry:
+            return None
+        _reporter.count('stat')
+        try:
+            return entry.stat()
+        except FileNotFoundError:
+            return None
+
+    def add_pending(self, src_p:Path, dst_p:Path):
+        """Add a file which is going to be copied/moved to `dst_p` from `src_p` without checking if it's 
+        unchanged (such as when resuming a job, where that was already checked), so it can be recorded."""
+        self.pending[str(dst_p)] = (os.stat(src_p), None)
+
+    def record(self, dst_p:Path):
+        """Record a file which was just copied/moved to `dst_p`, and give it the same access and 
+        modification times as its source file (so that it can be compared to it next time)."""
+        src_st, src_hash = self.pending.pop(str(dst_p))
+        os.utime(dst_p, ns=(src_st.st_atime_ns, src_st.st_mtime_ns))
+        if self.checksum and not src_hash:
+            src_hash = _hash_file(dst_p)
+        self._write(dst_p.relative_to(self.dst).as_posix(), src_st, src_hash)
+
+    def _write(self, rel_path:str, src_st:os.stat_result, src_hash:str|None):
+        if self.read_only:
+            return
+        self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (rel_path, src_st.st_size, src_st.st_mtime_ns, src_hash))
+        self.n_uncommitted += 1
+        if self.n_uncommitted >= 1000:
+            self.db.commit()                                            # commit in groups, as committing each record would be much slower
+            self.n_uncommitted = 0
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+class _Journal:
+    """An append-only journal of a copy/move job, stored in its destination directory `dst` (as 
+    `_JOURNAL_NAME`), so that if the job is interrupted, it can be resumed without walking the source 
+    again or copying/moving any of the paths which were already done.
+
+    The journal is a file of JSON lines: a header with the job's arguments, then the plan (a line of 
+    the source and destination paths, relative to `src` and `dst`, and whether it's a directory, for 
+    each path), then an end of plan marker, and then the destination path of each path once it's done. 
+    The plan is flushed to disk before anything is copied/moved, and the finished paths are written 
+    `_JOURNAL_FLUSH` at a time. Any finished paths which were lost are just done again when resuming 
+    (files are copied to a temporary file first, and moved files which are already gone are skipped)."""
+    def __init__(self, dst:Path, header:dict, plan:list[tuple[Path, Path, bool]], done:set=()):
+        self.dst, self.header, self.plan, self.done = dst, header, plan, set(done)
+        self.pending = []
+
+    @classmethod
+    def create(cls, src:Path, dst:Path, header:dict, plan:list[tuple[Path, Path, bool]]) -> '_Journal':
+        """Write a new journal for the `plan` of (source path, destination path, is directory) tuples 
+        from `src` to `dst` (replacing any existing one), and return it."""
+        header = {'src': str(src.resolve()), 'dst': str(dst.resolve()), **header}
+        with open(dst / _JOURNAL_NAME, 'w') as f:
+            f.write(json.dumps(header) + '\n')
+            for src_p, dst_p, is_dir in plan:
+                f.write(json.dumps([src_p.relative_to(src).as_posix(), dst_p.relative_to(dst).as_posix(), is_dir]) + '\n')
+            f.write(json.dumps({'planned': len(plan)}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())                                        # make sure the whole plan is saved before anything is changed
+        return cls(dst, header, plan)
+
+    @classmethod
+    def load(cls, src:Path, dst:Path) -> '_Journal':
+        """Read the journal of an unfinished job from `src` to `dst`, and return it."""
+        path = dst / _JOURNAL_NAME
+        assert path.is_file(), f'there is no unfinished job to resume in "{dst}"'
+        plan, done, planned = [], set(), None
+        with open(path) as f:
+            header = json.loads(f.readline())
+            for line in f:
                 try:
-                    i = int(filepath.stem[-2])
-                    copy_num = i+1
-                except:
-                    pass
-            # apply '(#)' suffix to path stem (name without file extension):
-            new_stem = filepath.stem + f'({copy_num})'                  
-            filepath = filepath.with_stem(new_stem)
-            print(f'renaming new file to "{filepath}"')
-        elif exists_action == 'replace':
-            print('existing file will be replaced')                     # if replace, do no file operations (would be replaced by any copy or move operations, so no need to do anything)
-        elif exists_action == 'skip':
-            print('skipping new file')
-            return                                                      # if skip, return None
-    return filepath                                                     # return the filepath
-
-def _get_tup_if_dst(src_p:Path, src:Path, dst:Path=None, exists_action:str="ask") -> Path | tuple[Path, Path] | None:
-    """Convert a single path to a tuple of both source `src` and destination paths 
-    if a destination `dst` is provided (and handle if the destination path already 
-    exists), otherwise return the source path unchanged."""
-    if not dst:
-        return src_p                                                    # if no destination provided, then return source path as is
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    break                                               # the last line may have only been partly written
+                if isinstance(item, list):
+                    plan.append((src / item[0], dst / item[1], item[2]))
+                elif 'planned' in item:
+                    planned = item['planned']
+                else:
+                    done.add(item['done'])
+        assert planned == len(plan), f'the journal in "{dst}" is incomplete (the job was interrupted while walking the source), so it must be started again'
+        assert Path(header['src']) == src.resolve(), f'the unfinished job in "{dst}" is from "{header["src"]}", not "{src}"'
+        return cls(dst, header, plan, done)
+
+    def remaining(self) -> list[tuple[Path, Path, bool]]:
+        """Return the (source path, destination path, is directory) tuples in the plan which aren't done yet."""
+        return [item for item in self.plan if item[1].relative_to(self.dst).as_posix() not in self.done]
+
+    def mark_done(self, dst_p:Path):
+        rel_path = dst_p.relative_to(self.dst).as_posix()
+        self.done.add(rel_path)
+        self.pending.append(json.dumps({'done': rel_path}) + '\n')
+        if len(self.pending) >= _JOURNAL_FLUSH:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with open(self.dst / _JOURNAL_NAME, 'a') as f:
+                f.writelines(self.pending)
+            self.pending = []
+
+    def close(self):
+        """Write any remaining finished paths, or delete the journal if every path in the plan is done."""
+        if len(self.done) >= len(self.plan):
+            (self.dst / _JOURNAL_NAME).unlink(missing_ok=True)
+        else:
+            self.flush()
+
+def _get_dst_path(src_p:Path, src:Path, dst:Path, is_file:bool, exists_action:str="ask", manifest:_SyncManifest=None) -> Path|None:
+    """Get the destination path for a single source path `src_p` by replacing its `src` parent portion 
+    with the destination directory `dst`. Return None if the path should be skipped, which is only for 
+    the 'update' exists action (which needs a `manifest`), where any files which are unchanged are skipped 
+    (only if `is_file` is True). Any other exists actions are handled by `_resolve_conflicts()`."""
     dst_p = dst / src_p.relative_to(src)                                # make the destination path by combining the destination directory + the relative source path
-    if src_p.is_file():                                                 # check for existing file paths (exisiting directories are ignored)
-        dst_p = _handle_existing_filepath(dst_p, exists_action)         # modify destination filepath if it exists 
-        if not dst_p:
-            return None                                                 # return None if destination path is None (result of "skip" exists_action)      
-    return (src_p, dst_p)                                               # return a tuple of both the original source path and the destination path
+    if is_file and (exists_action == 'update'):
+        return None if manifest.is_unchanged(src_p, dst_p) else dst_p   # skip the file if it's unchanged, otherwise it will be replaced
+    return dst_p
+
+def _sorted_scandir(a_dir:str|Path) -> list[os.DirEntry]|None:
+    """Return a list of the `os.DirEntry` objects in the directory `a_dir`, sorted by name (the same 
+    order as sorting a list of the paths). Return None if the directory could not be read."""
+    _reporter.count('scandir')
+    try:
+        with os.scandir(a_dir) as dir_it:
+            entries = list(dir_it)
+    except OSError as e:
+        _reporter.message(f'\n[!] Could not read "{a_dir}" ({e.strerror}), skipping it.')
+        return None                                                     # unreadable directories are skipped, just like `rglob()` does
+    entries.sort(key=lambda entry: entry.name)
+    return entries
+
+def _walk_entries(src:Path, matcher:_PathMatcher=None, skip:set=()) -> Iterator[os.DirEntry]:
+    """Recursively walk the directory `src` in a single pass with `os.scandir`, and yield an 
+    `os.DirEntry` for each file and empty directory whose relative path is valid for the 
+    `_PathMatcher` `matcher` (if provided), as well as for every directory containing them.
+
+    Entries are yielded in the same order as a sorted list of their paths, so every directory 
+    comes right before its contents. A non-empty directory is only yielded once the first valid 
+    path within it is found, so directories without any valid contents are never yielded. 
+    Directories matching an exclusion pattern are pruned as soon as they're seen, so nothing 
+    within them is ever read. Any entry paths in `skip` are not yielded or descended into either. 
+    The type info cached by each `DirEntry` is reused, so no path needs to be stat'ed again."""
+    if not matcher:
+        matcher = _PathMatcher()
+    children = _sorted_scandir(src)
+    if children is None:
+        return
+    # The stack of tuples of each directory entry being walked (`src` has no entry), an iterator of its 
+    # (remaining) children, and whether any part of its path matched an inclusion pattern (or there are none):
+    stack = [(None, iter(children), not matcher.include)]
+    n_yielded = 1                                                       # the number of directories at the bottom of the stack which have already been yielded (`src` itself never is)
+    timing, match_time, n_matched = _reporter.timing, 0.0, 0            # the matching is only timed if the reporter needs it (as it's done for every entry)
+    try:
+        while stack:
+            entry = next(stack[-1][1], None)
+            if entry is None:
+                stack.pop()                                             # if there are no children left in the current directory, go back up to its parent
+                n_yielded = min(n_yielded, len(stack))
+                continue
+            if entry.path in skip:
+                continue
+            if timing:
+                match_start = time.perf_counter()
+            n_matched += 1
+            excluded = matcher.is_excluded(entry.name)
+            # the path is valid if any of the parts before it or its own name match an inclusion (as the parts before it have already been checked for exclusions):
+            included = (not excluded) and (stack[-1][2] or matcher.is_included(entry.name))
+            if timing:
+                match_time += time.perf_counter() - match_start
+            if excluded:
+                continue                                                # if excluded, skip this path (and everything in it, if it's a directory)
+            if entry.is_dir(follow_symlinks=False):
+                children = _sorted_scandir(entry.path)
+                if children is None:
+                    continue
+                if children:
+                    stack.append((entry, iter(children), included))     # if the directory isn't empty, walk its children next (it's only yielded if any of them are)
+                    continue
+            elif not entry.is_file():
+                continue                                                # skip anything that isn't a file or directory (symlinks to directories, broken symlinks, sockets, etc.)
+            if not included:
+                continue                                                # if not valid, then skip this path
+            # NOTE: Non-empty directories are only yielded here, once the first valid path within them is found. 
+            # Any directories on the stack which haven't been yielded yet are always at the top of it, 
+            # so only those need to be yielded (in order) before the current path:
+            for dir_entry, _, _ in stack[n_yielded:]:
+                yield dir_entry
+            n_yielded = len(stack)
+            yield entry                                                 # yield the valid file or empty directory
+    finally:
+        _reporter.count('match', n_matched)
+        if timing:
+            _reporter.add_phase('match', match_time)
 
-def _get_paths(src:Path, dst:Path=None, exists_action:str="ask", include:list=[], exclude:list=[]) -> list[Path]:
-    """Get a recursive list of Path objects for all paths in a given directory path (`src`).
+def _get_paths(src:Path, dst:Path=None, exists_action:str="ask", include:list=[], exclude:list=[], manifest:_SyncManifest=None) -> Iterator[tuple[Path, Path|None, bool]]:
+    """Recursively yield tuples for all paths in a given directory path (`src`), where the first 
+    item is the Path object, the second item is its destination path (or None if no destination 
+    is provided), and the third is a bool for whether the path is a directory or not. 
+    The paths are yielded as the directory is walked (in sorted order), so any work on them 
+    can begin before all of the paths are found.
 
-    If a destination path is provided (`dst`), then the list will instead contain tuples where 
-    the first items are the same (all paths in `src`), and the second items paths made from 
+    If a destination path is provided (`dst`), then the destination paths will be made from 
     replacing the parent portion of the source paths with the destination directory (`dst`). 
     This can be used for functions which copy or move files from one directory to another.
-    - If this is the case, then this function will also check for and apply the 
-    `exists_action` to any destination file paths which already exist (existing dirs are ignored):
-        - 'ask' - prompt the user what to do for each individual file.
-        - 'rename' - keep the existing file and rename the current one.
-        - 'replace' - delete the existing file, before copying/moving the current file.
-        - 'skip' - don't copy/move this file, skip over it.
+    - If this is the case, and the `exists_action` is 'update', then any files which are unchanged 
+    are skipped (a `manifest` must be provided). Any other exists actions are applied to all of the 
+    paths at once afterwards, by `_resolve_conflicts()`.
 
     If a list of strings with simple glob patterns for `include` and/or 
-    `exclude` is provided, then this will only return the paths which have all of their 
+    `exclude` is provided, then this will only yield the paths which have all of their 
     *relative* (so not including the parents directory) individual parts not 
     matching any of the exclusion patterns and/or matching at least one inclusion 
     pattern.
@@ -109,76 +769,789 @@ def _get_paths(src:Path, dst:Path=None, exists_action:str="ask", include:list=[]
     it matches an exclusion pattern, then it and none of its contents will be included.
     """
     assert src.is_dir(), f'"{src}" is not an existing directory'        # ensure that src is an existing directory
-    path_list = []                                                      # the list to store all valid paths, to be eventually returned
-    print(f'\nFinding/generating all paths from "{src}" which match the given parameters...')
-    for src_p in src.rglob('*'):                                        # `rglob('*')` is an easy way to get all paths recursively within the directory
-        if not (src_p.is_file() or is_dir_empty(src_p)):
-            continue                                                    # if the source path is a not file or empty directory, skip it
-        if not _path_parts_valid(src_p.relative_to(src), include, exclude):
-            # valid means all parts in the relative path match no exclusions and 
-            # at least one inclusion (or there aren't any exlusions/inclusions).
-            continue                                                    # if not valid, then skip this path
-        final_src_p = _get_tup_if_dst(src_p, src, dst, exists_action)   # if dst was provided, convert path to a tuple of both source and destination paths, checking/handling if the destination path existis
-        if final_src_p:
-            path_list.append(final_src_p)                               # add the valid file(s) or empty-directory(ies) to the list
-        # NOTE: Non-empty directories are initially not added to path_list to prevent including directories 
-        # which may have all non-valid paths in them. But they may now be added with the following code if they 
-        # are the parents of the current existing valid path (even if they themselves wouldn't be a valid match).
-        parent_p = src_p.parent
-        while True:
-            if parent_p == src:
-                break                                                   # if the parent path is the src, break loop
-            final_parent_p = _get_tup_if_dst(parent_p, src, dst, exists_action)
-            if (not final_parent_p) or (final_parent_p in path_list):
-                break                                                   # if parent path(s) already in the list, break loop 
-            path_list.append(final_parent_p)                            # if this current path's parent is not the src and not in the list, then add it
-            parent_p = parent_p.parent                                  # set parent_p to be this path's parent's parent for the next loop
-    path_list.sort()
-    if not path_list:
-        print("\n[!] There are no paths here.")
-        return None                                                     # if there are no paths, return None
-    return path_list                                                    # sort the path_list and return it
-
-def _get_path_tree_str(a_path:Path, parent_dir:Path, current_n:int=None, total_n:int=None):
+    _reporter.message(f'\nFinding/generating all paths from "{src}" which match the given parameters...')
+    # NOTE: The skipped paths are joined the same way as `os.scandir` joins its entry paths (so a 
+    # source of '.' gives './backup' rather than 'backup'), otherwise they would never match:
+    skip = set()
+    if dst and dst.resolve().is_relative_to(src.resolve()):
+        skip.add(os.path.join(os.fspath(src), *dst.resolve().relative_to(src.resolve()).parts))  # if the destination is within the source, don't walk it (otherwise the copied paths would be found too)
+    if dst:
+        skip.update(os.path.join(os.fspath(src), _MANIFEST_NAME + suffix) for suffix in ('', '-wal', '-shm'))  # never copy/move a manifest (or its temporary files) from a previous sync
+        skip.add(os.path.join(os.fspath(src), _JOURNAL_NAME))           # or a journal from an unfinished job
+    n_paths = 0
+    walk_time, start = 0.0, time.perf_counter()                         # only the time spent in here counts for the walk phase (not the time spent on each path after it's yielded)
+    for entry in _walk_entries(src, _PathMatcher(include, exclude), skip):
+        src_p, is_dir = Path(entry.path), entry.is_dir(follow_symlinks=False)
+        dst_p = None
+        if dst:
+            dst_p = _get_dst_path(src_p, src, dst, not is_dir, exists_action, manifest)  # if dst was provided, get the destination path (checking if it's unchanged for 'update')
+            if not dst_p:
+                continue                                                # skip this path if its destination is None (result of the "update" exists_action)
+        n_paths += 1
+        walk_time += time.perf_counter() - start
+        yield (src_p, dst_p, is_dir)
+        start = time.perf_counter()
+    _reporter.add_phase('walk', walk_time + time.perf_counter() - start)
+    if not n_paths:
+        _reporter.message("\n[!] There are no paths here.")
+
+def _get_path_tree_str(a_path:Path, parent_dir:Path, current_n:int=None, total_n:int=None, is_dir:bool=None):
     """Get a string of the name of `a_path` with indentation corresponding to the number of parts it 
     has relative to `parent_dir`. If this function is called on each path in a list of paths, and each 
     value is printed, the display result will look like a path/directory tree. Can also provide the 
     current path list number and total number of all paths to display indices (this asumes the first 
-    path starts at `0`, and will add +1 to each)."""
+    path starts at `0`, and will add +1 to each). If the total is unknown (such as while the paths are 
+    still being found), only the current number is displayed. If `is_dir` is not provided, the path 
+    will be checked for whether it's a directory."""
     idx_str = ''
     if (current_n != None) and (total_n != None):
         index_str_len = len(str(total_n))                               # determine the number of digits of the total number of paths
         idx_str = f"{str(current_n+1).zfill(index_str_len)}/{total_n}"  # create the string for the current index and pad it with zeroes so it's the same length as the number of paths in source 
+    elif current_n != None:
+        idx_str = str(current_n+1)
+    if is_dir == None:
+        is_dir = a_path.is_dir()
     rel_path = a_path.relative_to(parent_dir)
-    p_name = f'[{rel_path.name}]' if a_path.is_dir() else rel_path.name # if the path is a dir, surround it with square brackets
+    p_name = f'[{rel_path.name}]' if is_dir else rel_path.name          # if the path is a dir, surround it with square brackets
     indent_str = '    ' * len(rel_path.parts)                           # each indent is 4 spaces, and the number of parts of the relative source path (without `parent_dir` path) determines the number of indents to print
     return idx_str + indent_str + p_name
 
+def _data_unsupported(e:OSError) -> bool:
+    """Return True if the error `e` means that a copy method isn't supported for a pair of files 
+    (by the OS, filesystem(s), or file types), so that another method can be tried instead."""
+    return e.errno in _UNSUPPORTED_ERRNOS
+
+def _reflink_data(src_fd:int, dst_fd:int, size:int) -> bool:
+    """Try to make the destination file share the same data blocks as the source file (a reflink/clone) 
+    on copy-on-write filesystems (such as btrfs or XFS), which takes no time regardless of the file size. 
+    Return False if this isn't supported."""
+    if not (fcntl and sys.platform.startswith('linux')):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as e:
+        if _data_unsupported(e):
+            return False
+        raise
+    return True
+
+def _kernel_copy_data(src_fd:int, dst_fd:int, size:int) -> bool:
+    """Try to copy all of the file data within the kernel (without passing it through userspace) 
+    using `os.copy_file_range()`, or `os.sendfile()` if that's not available. Return False if 
+    neither of these is supported (which can only happen before any data is copied)."""
+    for copy_func in (_copy_file_range, _sendfile):
+        if not copy_func:
+            continue
+        offset = 0
+        while True:
+            try:
+                n = copy_func(src_fd, dst_fd, offset, max(size - offset, _COPY_BUFFER_SIZE))
+            except OSError as e:
+                if (offset == 0) and _data_unsupported(e):
+                    break                                               # if unsupported, try the next function (nothing has been copied yet)
+                raise
+            if n == 0:
+                return True                                             # the end of the source file has been reached
+            offset += n
+    return False
+
+def _buffered_copy_data(src_fd:int, dst_fd:int, size:int) -> bool:
+    """Copy all of the file data in userspace with a large reusable buffer, after preallocating the 
+    space for it in the destination file (if supported), which reduces fragmentation. Always returns True."""
+    if size and hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(dst_fd, 0, size)
+        except OSError as e:
+            if not _data_unsupported(e):
+                raise                                                   # ignore it if preallocating isn't supported by the filesystem
+    buffer = memoryview(bytearray(_COPY_BUFFER_SIZE))
+    written = 0
+    with io.FileIO(src_fd, closefd=False) as src_f:
+        while n := src_f.readinto(buffer):
+            chunk = buffer[:n]
+            while chunk:
+                chunk = chunk[os.write(dst_fd, chunk):]                 # `os.write()` may not write everything at once
+            written += n
+    if written != size:
+        os.ftruncate(dst_fd, written)                                   # if the source file changed size, don't leave any preallocated space at the end
+    return True
+
+_COPY_FUNCS = {'reflink': _reflink_data, 'kernel': _kernel_copy_data, 'buffered': _buffered_copy_data}
+_COPY_METHODS = {                                                       # the copy methods to try (in order) for each copy mode
+    'auto':     ('reflink', 'kernel', 'buffered'),
+    'reflink':  ('reflink',),
+    'kernel':   ('kernel',),
+    'buffered': ('buffered',),
+}
+
+def _copy_file(src_path:Path, dst_path:Path, copy_mode:str='auto') -> str:
+    """Copy the data and permission bits of the file `src_path` to `dst_path` (like `shutil.copy()`), 
+    using the copy method(s) for `copy_mode`, and return the name of the method that was used:
+    - 'auto' - try 'reflink' first, then 'kernel', and then 'buffered', using the first one which works.
+    - 'reflink' - share the source file's data blocks (only on copy-on-write filesystems).
+    - 'kernel' - copy the data within the kernel, with `os.copy_file_range()` or `os.sendfile()`.
+    - 'buffered' - copy the data in userspace with a large buffer.
+    An `OSError` is raised if the method for `copy_mode` isn't supported.
+
+    The file is copied to a temporary file next to `dst_path` first, which is then renamed to `dst_path` 
+    (replacing it if it exists), so an interrupted copy never leaves a partly written file at `dst_path`."""
+    assert copy_mode in _COPY_METHODS, f'"{copy_mode}" is not a valid copy mode. Must be one of: {tuple(_COPY_METHODS)}'
+    _reporter.count('open', 2)
+    tmp_path = dst_path.with_name(dst_path.name + _TEMP_SUFFIX)
+    src_fd = os.open(src_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        src_st = os.fstat(src_fd)
+        try:
+            _reporter.count('stat')
+            if os.path.samestat(src_st, os.stat(dst_path)):
+                raise shutil.SameFileError(f'"{src_path}" and "{dst_path}" are the same file')   # make sure not to replace the source file
+        except FileNotFoundError:
+            pass
+        dst_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            try:
+                for method in _COPY_METHODS[copy_mode]:
+                    if _COPY_FUNCS[method](src_fd, dst_fd, src_st.st_size):
+                        break
+                else:
+                    raise OSError(errno.EOPNOTSUPP, f'The "{copy_mode}" copy mode is not supported for "{src_path}" to "{dst_path}"')
+                if hasattr(os, 'fchmod'):
+                    os.fchmod(dst_fd, stat.S_IMODE(src_st.st_mode))     # copy the permission bits through the open file (so no extra path lookup)
+            finally:
+                os.close(dst_fd)
+            if not hasattr(os, 'fchmod'):
+                os.chmod(tmp_path, stat.S_IMODE(src_st.st_mode))
+            os.replace(tmp_path, dst_path)                              # atomically put the finished file in place
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)                            # never leave a temporary file behind
+            raise
+    finally:
+        os.close(src_fd)
+    _reporter.count('bytes', src_st.st_size)
+    return method
+
+def _copy_move_file(src_path:Path, dst_path:Path, move:bool=False, copy_mode:str='auto') -> str:
+    """Copy (or move if `move` is True) a single file from `src_path` to `dst_path`, and return the 
+    name of the method that was used. Files are moved by renaming them, unless the destination is on 
+    a different filesystem, in which case they are copied with `copy_mode` (see `_copy_file()`), 
+    along with their timestamps (like `shutil.move()`), and then the source file is deleted."""
+    start = time.perf_counter()
+    method = None
+    if move:
+        try:
+            os.replace(src_path, dst_path)                              # move it from source to destination
+            method = 'rename'
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    if not method:
+        method = _copy_file(src_path, dst_path, copy_mode)              # copy the file to the destination path
+        if move:
+            shutil.copystat(src_path, dst_path)                         # if the destination is on another filesystem, copy the file and then delete the source
+            os.unlink(src_path)
+    _reporter.count(f'copy.{method}')
+    _reporter.file_time(src_path, time.perf_counter() - start)
+    return method
+
+def _copy_move_batch(batch:list[tuple[int, Path, Path, int]], move:bool=False, copy_mode:str='auto') -> list[tuple[int, Path, str|None, OSError|None]]:
+    """Copy or move each file in a `batch` of tuples of the index, source path, destination path, and 
+    size of each file. Return a list of tuples of the index, source path, copy method used, and the error 
+    which occurred for each file (or None), so that one failed file doesn't stop the others."""
+    results = []
+    for i, src_path, dst_path, _ in batch:
+        try:
+            method = _copy_move_file(src_path, dst_path, move, copy_mode)
+            results.append((i, src_path, method, None))
+        except OSError as e:
+            results.append((i, src_path, None, e))
+    return results
+
+def _imap_bounded(func, items:Iterator, workers:int) -> Iterator[tuple[object, object, OSError|None]]:
+    """Call `func` on each item from `items` with a pool of `workers` threads, and yield tuples of 
+    each item, its result, and the `OSError` raised by `func` (or None) as soon as each one finishes. 
+    Only up to twice as many items as `workers` are submitted at once, so `items` can be a generator 
+    and the number of items (and results) in memory stays bounded."""
+    def finished(futures):
+        for future in futures:
+            item = in_flight.pop(future)
+            try:
+                yield (item, future.result(), None)
+            except OSError as e:
+                yield (item, None, e)
+    with ThreadPoolExecutor(workers) as executor:
+        in_flight = {}
+        for item in items:
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)  # wait for at least one item to finish before submitting any more
+                yield from finished(done)
+            in_flight[executor.submit(func, item)] = item
+        yield from finished(wait(in_flight).done)
+
+def _schedule_batches(files:list[tuple[int, Path, Path, int]]) -> Iterator[list[tuple[int, Path, Path, int]]]:
+    """Yield batches (lists) of the tuples of each file's index, source path, destination path, and size 
+    in `files`, in order of largest to smallest. Each large file (at least `_LARGE_FILE_SIZE` bytes) gets 
+    its own batch so the largest ones are started first, while smaller files are grouped together into 
+    batches of up to `_BATCH_FILES` files or `_BATCH_BYTES` bytes, to reduce the overhead per file."""
+    files = sorted(files, key=lambda f: f[3], reverse=True)
+    batch, batch_bytes = [], 0
+    for f in files:
+        if f[3] >= _LARGE_FILE_SIZE:
+            yield [f]
+            continue
+        batch.append(f)
+        batch_bytes += f[3]
+        if (len(batch) >= _BATCH_FILES) or (batch_bytes >= _BATCH_BYTES):
+            yield batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+def _report_copy_move_errors(errors:list[tuple[int, Path, OSError]], move:bool=False):
+    """Report the tuples of the index, source path, and error of each file which could not be copied/moved 
+    (if there are any), in the same order as the paths."""
+    if errors:
+        _reporter.message(f'\n[!] {len(errors)} file(s) could not be {"moved" if move else "copied"}:')
+        for i, src_path, e in sorted(errors, key=lambda err: err[0]):
+            _reporter.error(src_path, e)
+
+def _copy_move_parallel(all_paths:Iterator[tuple[Path, Path, bool]], src:Path, move:bool=False, workers:int=4, copy_mode:str='auto', 
+                        manifest:_SyncManifest=None, copied:list=None, journal:_Journal=None) -> int:
+    """Copy or move all of the (source path, destination path, is directory) tuples from `all_paths` 
+    using a pool of `workers` threads, and return the total number of paths.
+
+    All of the paths are gathered and every destination directory is created first, then the files are 
+    dispatched in batches (see `_schedule_batches()`) to the thread pool, and copied with `copy_mode`. 
+    Only up to twice as many batches as `workers` are in flight at once (see `_imap_bounded()`), so 
+    the number of files (and buffers) in flight stays bounded. Any files which fail don't stop the 
+    others, and are all reported at the end in their sorted order. Each file which succeeds is 
+    recorded in the `manifest`, added to the `copied` list as a (source, destination) tuple, and 
+    marked as done in the `journal` (if any of them are provided)."""
+    # 1) Gather all the paths, and get the size of each file:
+    dirs, files, errors = [], [], []
+    for i, (src_path, dst_path, is_dir) in enumerate(all_paths):
+        if is_dir:
+            dirs.append((i, src_path, dst_path))
+            continue
+        try:
+            _reporter.count('stat')
+            files.append((i, src_path, dst_path, src_path.stat().st_size))
+        except OSError as e:
+            errors.append((i, src_path, e))
+    p_count = len(dirs) + len(files) + len(errors)                      # get the total count of all paths
+    _reporter.total = p_count
+    # 2) Create all of the destination directories up front:
+    for i, src_path, dst_path in dirs:
+        dst_path.mkdir(exist_ok=True)                                   # create the directory at the destination (if it doesn't exist already)
+        if journal:
+            journal.mark_done(dst_path)
+        _reporter.path(_get_path_tree_str(src_path, src, i, p_count, is_dir=True), src_path, is_dir=True)
+    # 3) Dispatch the files to the thread pool, and print each one as it finishes:
+    dst_paths = {i: dst_path for i, _, dst_path, _ in files}
+    copy_batch = functools.partial(_copy_move_batch, move=move, copy_mode=copy_mode)
+    for _, results, _ in _imap_bounded(copy_batch, _schedule_batches(files), workers):
+        for i, src_path, method, e in results:
+            if e:
+                errors.append((i, src_path, e))
+                continue
+            if manifest:
+                manifest.record(dst_paths[i])
+            if copied != None:
+                copied.append((src_path, dst_paths[i]))
+            if journal:
+                journal.mark_done(dst_paths[i])
+            _reporter.path(_get_path_tree_str(src_path, src, i, p_count, is_dir=False) + f'  ({method})', src_path, method=method)
+    # 4) Report any errors, in the same order as the paths:
+    _report_copy_move_errors(errors, move)
+    return p_count
+
+def _display_dupes(a_dir:Path, include:list=[], exclude:list=[], algorithm:str=_HASH_ALGORITHM, workers:int=None):
+    """Print each group of (non-empty) files in `a_dir` which have identical contents (see `display_dir()`)."""
+    # 1) Group the files by size, as only files with the same size can be identical:
+    by_size = {}
+    for p, _, is_dir in _get_paths(a_dir, include=include, exclude=exclude):
+        if not is_dir:
+            try:
+                _reporter.count('stat')
+                size = p.stat().st_size
+            except OSError:
+                continue
+            if size:
+                by_size.setdefault(size, []).append(p)
+    candidates = [p for paths in by_size.values() if len(paths) > 1 for p in paths]
+    # 2) Hash the files which have the same size as another, and group them by hash:
+    by_hash = {}
+    with _reporter.phase('hash'):
+        hashes = _hash_files(candidates, algorithm, workers)
+    for p, digest in hashes.items():
+        if not isinstance(digest, OSError):
+            by_hash.setdefault(digest, []).append(p)
+    groups = sorted(sorted(paths) for paths in by_hash.values() if len(paths) > 1)
+    if not groups:
+        _reporter.message('\nThere are no duplicate files.')
+        return
+    # 3) Print each group of duplicates (in the order of their first paths):
+    n_extra, extra_bytes = 0, 0
+    for group_n, paths in enumerate(groups):
+        size = paths[0].stat().st_size
+        _reporter.message(f'\n{len(paths)} identical files ({size} bytes each):')
+        for p in paths:
+            _reporter.path('    ' + str(p.relative_to(a_dir)), p, group=group_n, hash=hashes[p], size=size)
+        n_extra += len(paths) - 1
+        extra_bytes += size * (len(paths) - 1)
+    _reporter.message(f'\nThere are {len(groups)} groups of duplicate files, with {n_extra} extra copies using {extra_bytes} bytes.')
+
+def _scandir_fd(dir_fd:int) -> list[os.DirEntry]:
+    """Return a list of the `os.DirEntry` objects in the directory open as the file descriptor `dir_fd`."""
+    _reporter.count('scandir')
+    with os.scandir(dir_fd) as dir_it:
+        return list(dir_it)
+
+def _delete_tree_fd(parent_fd:int, name:str, path:str, matcher:_PathMatcher, included:bool) -> tuple[bool, int, list]:
+    """Delete the directory `name` in the directory open as the file descriptor `parent_fd`, along with 
+    all of its contents. Every path is opened, scanned, and deleted relative to its parent directory's file 
+    descriptor, so no full paths are ever resolved again (`path` is only used for error messages).
+    
+    Only the contents which are valid for the `matcher` are deleted (see `_PathMatcher`), where `included` 
+    is whether the directory itself (or any of its parents) already matches an inclusion. Any directory 
+    which was not empty is also deleted once all of its contents are, but originally empty directories are 
+    only deleted if they match. Return a tuple of whether the directory was deleted, the number of paths 
+    deleted, and a list of tuples of the path and error for each path which could not be deleted."""
+    n_deleted, errors = 0, []
+    # The stack of lists of each directory's file descriptor, an iterator of its (remaining) entries, its path, whether 
+    # it's included, whether it can be deleted (nothing in it was kept), its name, and its parent's file descriptor:
+    stack = []
+    def push(parent_fd, name, path, included):
+        fd = os.open(name, _O_DIR_FLAGS, dir_fd=parent_fd)
+        try:
+            entries = _scandir_fd(fd)
+        except OSError:
+            os.close(fd)
+            raise
+        stack.append([fd, iter(entries), path, included, bool(entries) or included, name, parent_fd])
+    try:
+        push(parent_fd, name, path, included)
+    except OSError as e:
+        return (False, 0, [(path, e)])
+    try:
+        while True:
+            frame = stack[-1]
+            entry = next(frame[1], None)
+            if entry is None:
+                stack.pop()                                             # if there are no entries left in the current directory, delete it (if possible) and go back up to its parent
+                os.close(frame[0])
+                deleted = False
+                if frame[4]:
+                    try:
+                        os.rmdir(frame[5], dir_fd=frame[6])
+                        deleted = True
+                        n_deleted += 1
+                    except OSError as e:
+                        errors.append((frame[2], e))
+                if not stack:
+                    return (deleted, n_deleted, errors)
+                if not deleted:
+                    stack[-1][4] = False                                # if this directory was kept, then its parent must be too
+                continue
+            if matcher.is_excluded(entry.name):
+                frame[4] = False                                        # excluded paths (and anything in them) are kept
+                continue
+            entry_path = os.path.join(frame[2], entry.name)
+            entry_included = frame[3] or matcher.is_included(entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    push(frame[0], entry.name, entry_path, entry_included)
+                elif entry_included:
+                    os.unlink(entry.name, dir_fd=frame[0])
+                    n_deleted += 1
+                else:
+                    frame[4] = False
+            except OSError as e:
+                errors.append((entry_path, e))
+                frame[4] = False
+    finally:
+        for frame in stack:
+            os.close(frame[0])                                          # make sure no file descriptors are left open if anything goes wrong
+
+def _delete_unlink_batch(parent_fd:int, names:list[str], parent_path:str) -> tuple[bool, int, list]:
+    """Delete each file in the list of `names` in the directory open as the file descriptor `parent_fd`. 
+    Return the same kind of tuple as `_delete_tree_fd()`, where the first item is whether all were deleted."""
+    n_deleted, errors = 0, []
+    for name in names:
+        try:
+            os.unlink(name, dir_fd=parent_fd)
+            n_deleted += 1
+        except OSError as e:
+            errors.append((os.path.join(parent_path, name), e))
+    return (not errors, n_deleted, errors)
+
+def _delete_dir_parallel(a_dir:Path, matcher:_PathMatcher, workers:int=1, delete_root:bool=True) -> tuple[int, list]:
+    """Delete the directory `a_dir` and everything in it which is valid for the `matcher` (see 
+    `_delete_tree_fd()`) with a pool of `workers` threads, and return the number of paths deleted 
+    and a list of tuples of the path and error for each path which could not be deleted. `a_dir` 
+    itself is only deleted if `delete_root` is True (and everything in it was deleted).
+
+    The top levels of the directory are split up (by the main thread) until there are at least four 
+    times as many subdirectories as `workers` (or `_DELETE_SPLIT_DEPTH` levels), then each of these 
+    subtrees is deleted by a worker, along with batches of the files in the split levels. Finally, the 
+    directories of the split levels are deleted from the bottom up (if everything in them was)."""
+    # Each "split" directory is a list of its file descriptor, the index of its parent, its name, path, 
+    # whether it's included, and whether it must be kept (if anything in it was kept):
+    split_dirs = [[os.open(a_dir, _O_DIR_FLAGS), None, a_dir.name, str(a_dir), not matcher.include, not delete_root]]
+    frontier = [0]                                                      # the indices of the split directories on the current level, to be split up next
+    tasks, errors = [], []
+    n_deleted = 0
+    try:
+        # 1) Split up the top levels, and create the tasks to delete their files and remaining subtrees:
+        for depth in range(_DELETE_SPLIT_DEPTH):
+            next_frontier = []
+            for idx in frontier:
+                fd, _, _, path, included, _ = split_dirs[idx]
+                try:
+                    entries = _scandir_fd(fd)
+                except OSError as e:
+                    errors.append((path, e))
+                    split_dirs[idx][5] = True
+                    continue
+                if not (entries or included):
+                    split_dirs[idx][5] = True                           # originally empty directories are only deleted if they match
+                names = []
+                for entry in entries:
+                    if matcher.is_excluded(entry.name):
+                        split_dirs[idx][5] = True
+                        continue
+                    entry_included = included or matcher.is_included(entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        next_frontier.append((idx, entry.name, os.path.join(path, entry.name), entry_included))
+                    elif entry_included:
+                        names.append(entry.name)
+                    else:
+                        split_dirs[idx][5] = True
+                for i in range(0, len(names), _BATCH_FILES):
+                    tasks.append((idx, functools.partial(_delete_unlink_batch, fd, names[i:i+_BATCH_FILES], path)))
+            if (len(next_frontier) >= workers * 4) or (depth == _DELETE_SPLIT_DEPTH - 1):
+                break                                                   # once there are enough subtrees for all the workers, stop splitting
+            frontier = []
+            for parent_idx, name, path, included in next_frontier:
+                try:
+                    fd = os.open(name, _O_DIR_FLAGS, dir_fd=split_dirs[parent_idx][0])
+                except OSError as e:
+                    errors.append((path, e))
+                    split_dirs[parent_idx][5] = True
+                    continue
+                frontier.append(len(split_dirs))
+                split_dirs.append([fd, parent_idx, name, path, included, False])
+        for parent_idx, name, path, included in next_frontier:
+            tasks.append((parent_idx, functools.partial(_delete_tree_fd, split_dirs[parent_idx][0], name, path, matcher, included)))
+        # 2) Delete all of the subtrees and batches of files with the thread pool:
+        for (parent_idx, _), result, e in _imap_bounded(lambda task: task[1](), tasks, workers):
+            if e:
+                result = (False, 0, [(split_dirs[parent_idx][3], e)])
+            all_deleted, n, task_errors = result
+            n_deleted += n
+            _reporter.advance(n)
+            errors += task_errors
+            if not all_deleted:
+                split_dirs[parent_idx][5] = True
+        # 3) Delete the split directories from the bottom up:
+        for idx in reversed(range(len(split_dirs))):
+            fd, parent_idx, name, path, _, keep = split_dirs[idx]
+            os.close(fd)
+            split_dirs[idx][0] = None
+            if keep:
+                if parent_idx != None:
+                    split_dirs[parent_idx][5] = True
+                continue
+            try:
+                if parent_idx == None:
+                    os.rmdir(a_dir)
+                else:
+                    os.rmdir(name, dir_fd=split_dirs[parent_idx][0])
+                n_deleted += 1
+            except OSError as e:
+                errors.append((path, e))
+                if parent_idx != None:
+                    split_dirs[parent_idx][5] = True
+    finally:
+        for split_dir in split_dirs:
+            if split_dir[0] != None:
+                os.close(split_dir[0])
+    return (n_deleted, errors)
+
+def _delete_dir_paths(a_dir:Path, include:list=[], exclude:list=[]) -> tuple[int, list]:
+    """Delete everything in the directory `a_dir` which is valid for `include` and `exclude` using 
+    full paths, for systems which can't delete paths relative to directory file descriptors (see 
+    `_delete_dir_parallel()`, which returns the same kind of tuple)."""
+    n_deleted, errors, dirs = 0, [], []
+    for p, _, is_dir in _get_paths(a_dir, include=include, exclude=exclude):
+        if is_dir:
+            dirs.append(p)
+            continue
+        try:
+            p.unlink()
+            n_deleted += 1
+        except OSError as e:
+            errors.append((str(p), e))
+    for p in reversed(dirs):
+        try:
+            p.rmdir()                                                   # delete each directory once everything in it was deleted (non-empty ones will fail, which is fine)
+            n_deleted += 1
+        except OSError:
+            pass
+    return (n_deleted, errors)
+
+def _delete_in_background(a_path:Path, workers:int=1):
+    """Rename `a_path` to a hidden path in the same directory (which is instant, and makes it disappear 
+    from its original path), then delete it with a separate background process which will keep going 
+    even after this one exits."""
+    hidden_path = a_path.with_name(f'.{a_path.name}.deleting-{os.getpid()}')
+    os.rename(a_path, hidden_path)
+    code = (f'import sys; sys.path.insert(0, {str(Path(__file__).resolve().parent)!r}); import ffuncs; '
+            f'ffuncs.permanent_delete({str(hidden_path.resolve())!r}, confirm=False, workers={workers})')
+    subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+def _get_compression(archive:Path, compression:str='auto', reading:bool=False) -> str:
+    """Return the compression of an `archive` ('none', 'gzip', or 'zstd'). If `compression` is 'auto', 
+    then it's determined from the first bytes of the archive if `reading` it, or otherwise from its 
+    file extension (".gz"/".tgz" for gzip, and ".zst"/".tzst" for zstd)."""
+    assert compression in _TAR_COMPRESSIONS, f'"{compression}" is not a valid compression. Must be one of: {_TAR_COMPRESSIONS}'
+    if compression == 'auto':
+        if reading:
+            with open(archive, 'rb') as f:
+                magic = f.read(4)
+            compression = 'gzip' if magic.startswith(b'\x1f\x8b') else 'zstd' if magic == b'\x28\xb5\x2f\xfd' else 'none'
+        else:
+            name = archive.name.lower()
+            compression = 'gzip' if name.endswith(('.gz', '.tgz')) else 'zstd' if name.endswith(('.zst', '.tzst')) else 'none'
+    assert (compression != 'zstd') or zstandard, 'the "zstandard" package must be installed for zstd compression'
+    return compression
+
+def _pack_read(src:Path, archive:Path, include:list, exclude:list, chunks:queue.Queue, stop:threading.Event, errors:list):
+    """The reader stage of `pack_dir()` (run in its own thread): walk `src` (applying the `include` and 
+    `exclude` patterns), and put a tuple of the path and its tar header (a `tarfile.TarInfo`) for each 
+    path in the `chunks` queue, followed by the chunks of its data (bytes) if it's a file, and then None 
+    at the end. Any paths which can't be read are reported and added to the `errors` list (as tuples of 
+    their path and the `OSError`) and left out, while any other error is put in the queue instead, to be 
+    raised by the next stage. Stops early if `stop` is set (once the queue has room)."""
+    try:
+        archive_path = os.path.abspath(archive)
+        for p, _, is_dir in _get_paths(src, include=include, exclude=exclude):
+            if os.path.abspath(p) == archive_path:
+                continue                                                # never pack the archive into itself
+            f = None
+            try:
+                _reporter.count('stat')
+                st = os.stat(p)
+                if not is_dir:
+                    _reporter.count('open')
+                    f = open(p, 'rb', buffering=0)
+            except OSError as e:
+                _reporter.error(p, e)
+                errors.append((p, e))
+                continue
+            info = tarfile.TarInfo(p.relative_to(src).as_posix())
+            info.mode, info.mtime, info.uid, info.gid = stat.S_IMODE(st.st_mode), st.st_mtime, st.st_uid, st.st_gid
+            if is_dir:
+                info.type = tarfile.DIRTYPE
+            else:
+                info.size = st.st_size
+            chunks.put((p, info))
+            if f:
+                with f:
+                    remaining = st.st_size
+                    while remaining and not stop.is_set():
+                        chunk = f.read(min(remaining, _COPY_BUFFER_SIZE))
+                        if not chunk:
+                            break                                       # the file got smaller while reading it (the next stage pads it)
+                        remaining -= len(chunk)
+                        chunks.put(chunk)
+            if stop.is_set():
+                return
+        chunks.put(None)
+    except BaseException as e:
+        chunks.put(e)
+
+def _pack_write(archive:Path, writes:queue.Queue, errors:list):
+    """The writer stage of `pack_dir()` (run in its own thread): write each chunk of (compressed) 
+    bytes from the `writes` queue to the `archive` file, until None is reached. If an error occurs, 
+    it's added to the `errors` list, and the rest of the chunks are discarded."""
+    try:
+        with open(archive, 'wb') as f:
+            while (data := writes.get()) is not None:
+                f.write(data)
+    except OSError as e:
+        errors.append(e)
+        while writes.get() is not None:
+            pass                                                        # keep emptying the queue, so the previous stage never gets stuck
+
+def _pack_compress(src:Path, chunks:queue.Queue, writes:queue.Queue, write_errors:list, compression:str='none', errors:list=None):
+    """The compressor stage of `pack_dir()`: turn each header and data chunk from the `chunks` queue 
+    (see `_pack_read()`) into a tar stream, compress it with the `compression`, and put the results 
+    in the `writes` queue (see `_pack_write()`). Each path is reported once its header is reached, and 
+    any file which got smaller while it was read is reported and added to the `errors` list (if provided). 
+    Stops by raising the first error in `write_errors` if the writer stage fails."""
+    if compression == 'gzip':
+        compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)   # `wbits` of 31 makes a gzip stream
+    elif compression == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compressobj()
+    else:
+        compressor = None
+    def emit(data:bytes):
+        if write_errors:
+            raise write_errors[0]
+        out = compressor.compress(data) if compressor else data
+        if out:
+            writes.put(out)
+    def finish_file(a_path:Path, remaining:int, size:int):
+        if remaining:
+            _reporter.error(a_path, 'file got smaller while packing it, the rest was filled with zeros')
+            if errors is not None:
+                errors.append((a_path, 'file got smaller while packing it'))
+            emit(bytes(remaining))                                      # the size in the header must always match the data
+        if size % tarfile.BLOCKSIZE:
+            emit(bytes(tarfile.BLOCKSIZE - (size % tarfile.BLOCKSIZE)))  # the data of each file is padded to a whole block
+    current, remaining, n_written = None, 0, 0
+    while (item := chunks.get()) is not None:
+        if isinstance(item, BaseException):
+            raise item
+        if isinstance(item, tuple):
+            if current:
+                finish_file(current[0], remaining, current[1].size)
+            a_path, info = item
+            header = info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+            emit(header)
+            n_written += len(header) + info.size + (-info.size % tarfile.BLOCKSIZE)
+            current, remaining = item, info.size
+            is_dir = info.isdir()
+            _reporter.path(_get_path_tree_str(a_path, src, is_dir=is_dir), a_path, is_dir)
+            continue
+        remaining -= len(item)
+        _reporter.count('bytes', len(item))
+        emit(item)
+    if current:
+        finish_file(current[0], remaining, current[1].size)
+    end = 2 * tarfile.BLOCKSIZE                                         # the end of the archive is marked by two zero blocks
+    end += -(n_written + end) % tarfile.RECORDSIZE                      # then padded to a whole record (the same as `tarfile` does)
+    emit(bytes(end))
+    if compressor:
+        writes.put(compressor.flush())
+
+def _unpack_members(tar:tarfile.TarFile, dst:Path, dirs:list, skipped:list, errors:list, mode_mask:int=0o777) -> Iterator[tuple[Path, bytes, int, float]]:
+    """Extract each member of the `tar` stream into the destination directory `dst` (in order), and yield a 
+    tuple of the path, data, mode, and modification time of each smaller file (less than `_LARGE_FILE_SIZE` 
+    bytes), so that they can be written in parallel (see `_write_unpacked_file()`). Directories are created 
+    (and added to the `dirs` list as tuples of their path and member) and larger files are written as soon as 
+    they're reached. Any unsafe members (outside of `dst`) or ones which aren't regular files or directories 
+    are added to the `skipped` list as tuples of their name and the reason, while the "." member (of the 
+    destination itself) is ignored. Any directories or larger files which fail are added to the `errors` 
+    list as tuples of their path and the `OSError`, without stopping the others. The mode of each member 
+    is masked with `mode_mask`, so no setuid, setgid, or sticky bits (or any bits which the umask doesn't 
+    allow) are ever set."""
+    made_dirs = {dst}                                                   # the directories which are known to exist
+    for member in tar:
+        rel_path = Path(member.name)
+        if not rel_path.parts:
+            continue                                                    # the "." member is the destination itself
+        if rel_path.is_absolute() or ('..' in rel_path.parts):
+            skipped.append((member.name, 'the path is outside of the destination'))
+            continue
+        if not (member.isfile() or member.isdir()):
+            skipped.append((member.name, 'only regular files and directories are unpacked'))
+            continue
+        a_path = dst / rel_path
+        member.mode &= mode_mask
+        try:
+            if member.isdir():
+                a_path.mkdir(parents=True, exist_ok=True)
+                made_dirs.add(a_path)
+                dirs.append((a_path, member))
+                _reporter.path(_get_path_tree_str(a_path, dst, is_dir=True), a_path, is_dir=True)
+                continue
+            if a_path.parent not in made_dirs:
+                a_path.parent.mkdir(parents=True, exist_ok=True)        # if the archive doesn't have the parent directory before the file
+                made_dirs.add(a_path.parent)
+            f = tar.extractfile(member)
+            if member.size < _LARGE_FILE_SIZE:
+                yield (a_path, f.read(), member.mode, member.mtime)     # the data has to be read now, before the next member in the stream
+                continue
+            start = time.perf_counter()
+            with open(a_path, 'wb') as dst_f:
+                shutil.copyfileobj(f, dst_f, _COPY_BUFFER_SIZE)         # larger files are written right away, so they're never all in memory
+            os.chmod(a_path, member.mode)
+            os.utime(a_path, (member.mtime, member.mtime))
+        except OSError as e:
+            errors.append((a_path, e))                                  # the rest of this member's data is skipped when the next member is read
+            continue
+        _reporter.count('bytes', member.size)
+        _reporter.file_time(a_path, time.perf_counter() - start)
+        _reporter.path(_get_path_tree_str(a_path, dst, is_dir=False), a_path)
+
+def _write_unpacked_file(item:tuple[Path, bytes, int, float]):
+    """Write a file from a tuple of its path, data, mode, and modification time (see `_unpack_members()`)."""
+    a_path, data, mode, mtime = item
+    start = time.perf_counter()
+    _reporter.count('open')
+    fd = os.open(a_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]                            # `os.write()` may not write everything at once
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, mode)
+    finally:
+        os.close(fd)
+    if not hasattr(os, 'fchmod'):
+        os.chmod(a_path, mode)
+    os.utime(a_path, (mtime, mtime))
+    _reporter.count('bytes', len(data))
+    _reporter.file_time(a_path, time.perf_counter() - start)
+
 
 #--------- Main File Functions ---------#
 
-def display_dir(a_dir:str|Path, include:str=[], exclude:str=[]):
+# NOTE: Every main function takes the `output` and `stats` arguments, which determine how everything is output 
+# (see `_Reporter`): `output` can be 'text' (print each path), 'quiet' (only messages and a progress bar), or 
+# 'json' (an NDJSON stream of events), and if `stats` is True, a summary of the metrics is printed at the end.
+
+def display_dir(a_dir:str|Path, include:str=[], exclude:str=[], dupes:bool=False, algorithm:str=_HASH_ALGORITHM, workers:int=None, 
+                output:str='text', stats:bool=False):
     """Display a directory `dir` in the terminal. Recursively print all files/directoriess in a tree pattern.
     May also pass in a list of strings with glob patterns to either `include` and/or `exclude`. Each individual 
-    part of each path in `dir` must match (for `include`) or not match (`exclude`) to be displayed."""
+    part of each path in `dir` must match (for `include`) or not match (`exclude`) to be displayed.
+    
+    If `dupes` is True, then only the groups of files with identical contents are displayed instead. 
+    Only files with the same size are hashed (with the hashlib `algorithm`, using `workers` threads, 
+    or the number of CPUs if not provided), and unchanged files are only hashed once (see `_HashCache`)."""
     a_dir = Path(a_dir)                                                 # make path string into a Path object
-    dir_paths = _get_paths(a_dir, include=include, exclude=exclude)     # get a list of all paths in `dir`, applying inclusions/exclusions
-    if not dir_paths:
-        return
-    # Print out each path (with identation):
-    n_dirs = 0
-    for p in dir_paths:
-        print(_get_path_tree_str(p, a_dir))                             # print the relative path with indentation (for tree-looking output)
-        if p.is_dir():
-            n_dirs += 1                                                 # if path is a dir, increment number of dirs - `n_dirs`
-    # Print the total number of files and dirs:
-    n_files = len(dir_paths) - n_dirs
-    n_file_msg = f"are {n_files} files" if n_files != 1 else f"is {n_files} file"
-    n_dir_msg = f"{n_dirs} directories" if n_files != 1 else f"{n_dirs} directory"
-    print(f'\nThere {n_file_msg} and {n_dir_msg}.')
-
-def copy_move_dir(src:str|Path, dst:str|Path=None, move:bool=False, include:str=[], exclude:str=[], dst_path_exists:str='ask'):
-    """Recursively copy or move all paths from a source directory (`src`), to a destination directory (`dst`).
+    with _reporting('dupes' if dupes else 'list', output, stats):
+        if dupes:
+            _display_dupes(a_dir, include, exclude, algorithm, workers)
+            return
+        # Print out each path (with identation) as soon as it's found:
+        n_paths, n_dirs = 0, 0
+        for p, _, is_dir in _get_paths(a_dir, include=include, exclude=exclude):    # walk all paths in `dir`, applying inclusions/exclusions
+            _reporter.path(_get_path_tree_str(p, a_dir, is_dir=is_dir), p, is_dir)  # print the relative path with indentation (for tree-looking output)
+            n_paths += 1
+            if is_dir:
+                n_dirs += 1                                             # if path is a dir, increment number of dirs - `n_dirs`
+        if not n_paths:
+            return
+        # Print the total number of files and dirs:
+        n_files = n_paths - n_dirs
+        n_file_msg = f"are {n_files} files" if n_files != 1 else f"is {n_files} file"
+        n_dir_msg = f"{n_dirs} directories" if n_files != 1 else f"{n_dirs} directory"
+        _reporter.message(f'\nThere {n_file_msg} and {n_dir_msg}.')
+
+def copy_move_dir(src:str|Path, dst:str|Path=None, move:bool=False, include:str=[], exclude:str=[], dst_path_exists:str='ask', workers:int=1, 
+                  copy_mode:str='auto', checksum:bool=False, verify:bool=False, dry_run:bool=False, resume:bool=False, 
+                  output:str='text', stats:bool=False) -> bool:
+    """Recursively copy or move all paths from a source directory (`src`), to a destination directory (`dst`). 
+    Return True if every path was copied/moved (and all of the files match, if `verify`), otherwise False.
+
+    First, the source is walked to make a plan of every path to copy/move and its destination path 
+    (handling any which already exist), then the plan is carried out. While it is, a journal of the 
+    plan and every path which is done is kept in `dst` (see `_Journal`), and deleted once everything 
+    is done, so that an interrupted job can be resumed. Each file is copied to a temporary file and 
+    then renamed, so no partly copied files are ever left in `dst`.
     
     # Arguments: 
     - `src` and `dst`: path strings specifying the source and destination to copy from / move to.
@@ -186,52 +1559,318 @@ def copy_move_dir(src:str|Path, dst:str|Path=None, move:bool=False, include:str=
     not specified, False (so copy) is the default.
     - `exists_action`: a string saying what to do if the a file path in the source already exists in the 
     destination (directories will be ignored). Can be one of the following:
-        - 'ask' - prompt the user what to do for each individual file.
+        - 'ask' - list all of the existing files, and prompt the user once what to do with all of them (or for each individual file).
         - 'rename' - keep the existing file and rename the current one.
         - 'replace' - delete the existing file, before copying/moving the current file.
         - 'skip' - don't copy/move this file, skip over it.
+        - 'update' - skip this file if it's unchanged (same size and modification time), otherwise replace 
+        it. Each destination directory is only listed once, so this makes it quick to keep a destination 
+        directory in sync with a source which only changes a little each time. The details of each file 
+        are also recorded in a manifest file in `dst`, which only saves reading the destination files 
+        again when `checksum` is True (their recorded hashes are used instead).
     - `include`: a lists of strings of a glob patterns which each individual part of the path must match in order to be included.
     - `exclude`: a lists of strings of a glob patterns which each individual part of the path must NOT match in order to be included.
+    - `workers`: the number of threads to copy/move files with. If more than 1, the files are copied/moved 
+    in parallel (largest first), and any files which fail are reported at the end.
+    - `copy_mode`: how the file data is copied (also used for moves between different filesystems). The 
+    method used for each file is shown next to it. Can be one of the following:
+        - 'auto' - use the fastest method which is supported for each file.
+        - 'reflink' - share the source file's data blocks (only on copy-on-write filesystems, such as btrfs or XFS).
+        - 'kernel' - copy the data within the kernel, with `os.copy_file_range()` or `os.sendfile()`.
+        - 'buffered' - copy the data in userspace with a large buffer.
+    - `checksum`: a bool, where if True, the 'update' exists action also compares the hashes of the files 
+    (so every source file is read, but changes which kept the same size and modification time are found).
+    - `verify`: a bool, where if True, the hashes of all of the copied/moved files are compared with their 
+    sources once they're done, and any which don't match are reported. When moving, the source files are 
+    hashed before they're moved.
+    - `dry_run`: a bool, where if True, only the plan is displayed (with the destination of any paths 
+    which would be renamed), and nothing is changed.
+    - `resume`: a bool, where if True, the unfinished job from `src` to `dst` is resumed from its journal 
+    (with the same plan, so the source isn't walked again), and only the paths which aren't done are 
+    copied/moved. This is also how any files which failed can be tried again. The job is always resumed 
+    with the same `move`, `copy_mode`, `dst_path_exists`, and `checksum` as when it was started (so 
+    the ones given are ignored), and `include` and `exclude` can't be given.
+    - `output` and `stats`: how everything is output, and whether to print a summary of the metrics.
     """
-    # 1) Check/setup source and destination directories:
+    assert workers >= 1, f'"{workers}" is not a valid number of workers, must be at least 1'
+    assert copy_mode in _COPY_METHODS, f'"{copy_mode}" is not a valid copy mode. Must be one of: {tuple(_COPY_METHODS)}'
+    assert not (dry_run and resume), 'cannot do a dry run of resuming a job'
     src, dst = Path(src), Path(dst)                                     # make each path string into a Path object
-    if not dst.is_dir():
-        print(f'\n"{dst}" is not an existing destination directory. Creating it now...')
-        dst.mkdir(parents=True)                                         # check if `dst` is an existing directory, and create it if not
-    # 2) Get list of all files and dirs in source, determine the destination paths for each, and find and handle any existing ones:
-    all_paths = _get_paths(src, dst, dst_path_exists, include, exclude)
-    if not all_paths:
-        return                                                          # if there are no paths, return immeditately
-    # 3) Copy or move each file & dir from source to destination:
-    print(f'\n{"Moving" if move else "Copying"} all files and directories from "{src}" to "{dst}":\n')
-    p_count = len(all_paths)                                            # get the total count of all paths
-    for i, p in enumerate(all_paths):
-        src_path, dst_path = p
-        if src_path.is_file():
-            if not move:
-                shutil.copy(src_path, dst_path)                         # if the source path is a file, copy it to the destination path
+    journal = None
+    if resume:
+        assert not (include or exclude), 'a resumed job keeps the same paths as when it was started, so inclusions and exclusions cannot be given'
+        journal = _Journal.load(src, dst)
+        # a resumed job is always done the same way as when it was started:
+        move, copy_mode, dst_path_exists, checksum = (journal.header[key] for key in ('move', 'copy_mode', 'exists', 'checksum'))
+    operation = 'move' if move else 'copy'
+    with _reporting(operation, output, stats):
+        # 1) Check/setup source and destination directories:
+        if not (dst.is_dir() or dry_run):
+            _reporter.message(f'\n"{dst}" is not an existing destination directory. Creating it now...')
+            dst.mkdir(parents=True)                                     # check if `dst` is an existing directory, and create it if not
+        if (not resume) and (dst / _JOURNAL_NAME).is_file() and not dry_run:
+            _reporter.message(f'\n[!] "{dst}" has an unfinished job, which will be replaced (use resume to continue it instead).')
+        manifest = _SyncManifest(dst, checksum, read_only=dry_run) if dst_path_exists == 'update' else None
+        try:
+            # 2) Make the plan: walk all files and dirs in source, determine the destination paths for each, and find and handle any existing ones:
+            if resume:
+                plan = []
+                for src_path, dst_path, is_dir in journal.remaining():
+                    if move and not (is_dir or os.path.lexists(src_path)) and os.path.lexists(dst_path):
+                        journal.mark_done(dst_path)                     # if the source file is already gone, then it was moved before it could be marked as done
+                        continue
+                    if manifest and not is_dir:
+                        manifest.add_pending(src_path, dst_path)
+                    plan.append((src_path, dst_path, is_dir))
+                _reporter.message(f'\nResuming the unfinished job, with {len(plan)} of {len(journal.plan)} path(s) left to {operation}.')
             else:
-                shutil.move(src_path, dst_path)                         # or move it from source to destination
-        elif src_path.is_dir():
-            if not dst_path.is_dir():
-                dst_path.mkdir()                                        # if the source path is a directory and the destination dir path doesn't exist, create the directory at the destination
-        print(_get_path_tree_str(src_path, src, i, p_count))            # print the relative source path with index and indentation (for tree-looking output)
-    print('\nDone!')
-
-def permanent_delete(a_path:str|Path, confirm:bool=True):
+                plan = list(_get_paths(src, dst, dst_path_exists, include, exclude, manifest))
+                if dst_path_exists != 'update':
+                    with _reporter.phase('conflicts'):
+                        plan = _resolve_conflicts(plan, dst, dst_path_exists)   # find and handle any existing destination files all at once
+            if dry_run:
+                _reporter.message(f'\nThe following paths would be {"moved" if move else "copied"} from "{src}" to "{dst}":\n')
+                for i, (src_path, dst_path, is_dir) in enumerate(plan):
+                    tree_str = _get_path_tree_str(src_path, src, i, len(plan), is_dir=is_dir)
+                    if dst_path != dst / src_path.relative_to(src):
+                        tree_str += f'  -> "{dst_path.relative_to(dst)}"'   # show the new destination of any path which would be renamed
+                    _reporter.path(tree_str, src_path, is_dir, dst=str(dst_path))
+                _reporter.message('\nDry run, so nothing was changed.')
+                return True
+            if not resume:
+                journal = _Journal.create(src, dst, {'move': move, 'copy_mode': copy_mode, 'exists': dst_path_exists, 'checksum': checksum}, plan)
+            copied, src_hashes = [] if verify else None, None
+            if verify and move:                                         # if verifying moved files, hash the source files before they're gone
+                _reporter.message('\nHashing all source files to verify them once they are moved...')
+                with _reporter.phase('hash'):
+                    src_hashes = _hash_files([p for p, _, is_dir in plan if not is_dir], workers=(workers if workers > 1 else None))
+            # 3) Copy or move each file & dir from source to destination:
+            _reporter.message(f'\n{"Moving" if move else "Copying"} all files and directories from "{src}" to "{dst}":\n')
+            with _reporter.phase(operation):
+                if workers > 1:
+                    n_paths = _copy_move_parallel(plan, src, move, workers, copy_mode, manifest, copied, journal)  # copy/move the files with a thread pool
+                else:
+                    n_paths, errors = len(plan), []
+                    _reporter.total = n_paths
+                    for i, (src_path, dst_path, is_dir) in enumerate(plan):     # or copy/move each path one at a time
+                        tree_str = _get_path_tree_str(src_path, src, i, n_paths, is_dir=is_dir)  # get the relative source path with index and indentation (for tree-looking output)
+                        method = None
+                        if not is_dir:
+                            try:
+                                method = _copy_move_file(src_path, dst_path, move, copy_mode)   # if the source path is a file, copy/move it to the destination path
+                            except OSError as e:
+                                errors.append((i, src_path, e))         # a file which fails doesn't stop the others (the same as with multiple workers)
+                                continue
+                            tree_str += f'  ({method})'                 # and show which copy method was used for it
+                            if manifest:
+                                manifest.record(dst_path)
+                            if verify:
+                                copied.append((src_path, dst_path))
+                        else:
+                            dst_path.mkdir(exist_ok=True)               # if the source path is a directory, create the directory at the destination (if it doesn't exist already)
+                        journal.mark_done(dst_path)
+                        _reporter.path(tree_str, src_path, is_dir, **({'method': method} if method else {}))
+                    _report_copy_move_errors(errors, move)
+        finally:
+            if manifest:
+                manifest.close()                                        # always save the manifest, so anything copied before an error is still recorded
+            if journal:
+                journal.close()                                         # and the journal, so the job can be resumed (or delete it if the job is done)
+        if manifest and manifest.n_unchanged:
+            _reporter.count('unchanged', manifest.n_unchanged)
+            _reporter.message(f'\n{manifest.n_unchanged} unchanged file(s) were skipped.')
+        complete = len(journal.done) >= len(journal.plan)
+        if not complete:
+            _reporter.message(f'\n[!] Not everything was {"moved" if move else "copied"}, so this job can be resumed to try again.')
+        if not n_paths:
+            return complete                                             # if there were no paths, return immeditately
+        # 4) Verify the copied/moved files (if `verify`):
+        problems = []
+        if verify:
+            _reporter.message(f'\nVerifying all {"moved" if move else "copied"} files...')
+            with _reporter.phase('verify'):
+                problems = _verify_pairs(copied, workers=(workers if workers > 1 else None), src_hashes=src_hashes)
+            _print_verify_problems(problems, len(copied))
+        _reporter.message('\nDone!')
+    return complete and not problems
+
+def verify_dirs(src:str|Path, dst:str|Path, include:str=[], exclude:str=[], algorithm:str=_HASH_ALGORITHM, workers:int=None, 
+                output:str='text', stats:bool=False) -> bool:
+    """Verify that every file in a source directory (`src`) has an identical copy (with the same relative 
+    path) in a destination directory (`dst`), by comparing their hashes. Any files which are missing or 
+    different are printed, and True is returned if there are none (otherwise False).
+    - `include` and `exclude`: lists of glob patterns to filter the source paths (see `copy_move_dir()`).
+    - `algorithm`: the name of the hashlib algorithm to hash the files with.
+    - `workers`: the number of threads to hash files with (the number of CPUs if not provided). Files 
+    which haven't changed since they were last hashed aren't read again (see `_HashCache`).
+    - `output` and `stats`: how everything is output, and whether to print a summary of the metrics.
+    """
+    src, dst = Path(src), Path(dst)                                     # make each path string into a Path object
+    assert dst.is_dir(), f'"{dst}" is not an existing directory'
+    with _reporting('verify', output, stats):
+        pairs = [(p, dst / p.relative_to(src)) for p, _, is_dir in _get_paths(src, include=include, exclude=exclude) if not is_dir]
+        _reporter.message(f'\nVerifying all {len(pairs)} files from "{src}" against "{dst}"...')
+        with _reporter.phase('verify'):
+            problems = _verify_pairs(pairs, algorithm, workers)
+        _reporter.count('files', len(pairs))
+        _print_verify_problems(problems, len(pairs))
+    return not problems
+
+def permanent_delete(a_path:str|Path, confirm:bool=True, include:str=[], exclude:str=[], workers:int=1, background:bool=False, 
+                     output:str='text', stats:bool=False) -> bool:
     """Delete a file or directory (including anything within that directory).
-    If `confirm` is true, will ask user for confirmation before deleting"""
+    If `confirm` is true, will ask user for confirmation before deleting.
+    Return False if any paths could not be deleted, otherwise True (even if the user aborts).
+
+    - `include` and `exclude`: lists of glob patterns, where only the paths in the directory which are 
+    valid for them are deleted (the same as for `display_dir()` and `copy_move_dir()`). Directories are 
+    deleted once everything in them has been, but the directory `a_path` itself is kept.
+    - `workers`: the number of threads to delete with. Separate subtrees of the directory, and batches of 
+    files, are deleted in parallel. All paths are deleted relative to their parent directory's file 
+    descriptor (if the system supports it), so no full paths need to be resolved.
+    - `background`: a bool, where if True, the path is instantly renamed to a hidden path next to it, and 
+    then deleted by a separate background process (so this returns right away). Can't be used with 
+    `include` or `exclude`.
+    - `output` and `stats`: how everything is output, and whether to print a summary of the metrics.
+    """
     a_path = Path(a_path)                                               # ensure that a_path is a Path object
     assert a_path.exists(), f'\n"{a_path}" must be an existing file or directory\n' # ensure that the path leads to an exisiting path
-    if confirm:                                                         # if `confirm` is True, as user for confirmation
-        print(f'\n"{a_path}" will be permanently deleted.')
-        print('Are you sure you want to continue? (Y/y)')
-        if input('> ').lower() != "y":                                  # if user didn't enter 'y', then abort operation
-            print('\nAborting delete. Nothing will be deleted')
-            return
-    print(f'\nDeleting "{a_path}"...')
-    if a_path.is_file():
-        a_path.unlink()
-    elif a_path.is_dir():
-        shutil.rmtree(a_path)
-    print('\nDone!')
+    assert workers >= 1, f'"{workers}" is not a valid number of workers, must be at least 1'
+    assert not (background and (include or exclude)), 'cannot delete in the background with inclusions or exclusions'
+    with _reporting('delete', output, stats):
+        if confirm:                                                     # if `confirm` is True, as user for confirmation
+            if include or exclude:
+                msg = f'\nAll paths in "{a_path}" which match the given parameters will be permanently deleted.'
+            else:
+                msg = f'\n"{a_path}" will be permanently deleted.'
+            if _reporter.ask(msg + '\nAre you sure you want to continue? (Y/y)').lower() != "y":  # if user didn't enter 'y', then abort operation
+                _reporter.message('\nAborting delete. Nothing will be deleted')
+                return True
+        if background:
+            _reporter.message(f'\nDeleting "{a_path}" in the background...')
+            _delete_in_background(a_path, workers)
+            _reporter.message('\nDone!')
+            return True
+        _reporter.message(f'\nDeleting "{a_path}"...')
+        result, errors = None, []
+        with _reporter.phase('delete'):
+            if a_path.is_symlink() or not a_path.is_dir():
+                a_path.unlink()                                         # if it's a file (or a symlink), just delete it
+                result = (1, [])
+            elif _DIR_FD_SUPPORTED:
+                result = _delete_dir_parallel(a_path, _PathMatcher(include, exclude), workers, delete_root=not (include or exclude))
+            elif include or exclude:
+                result = _delete_dir_paths(a_path, include, exclude)
+            else:
+                shutil.rmtree(a_path)
+        if result:
+            n_deleted, errors = result
+            _reporter.count('deleted', n_deleted)
+            _reporter.message(f'\n{n_deleted} path(s) were deleted.')
+            if errors:
+                _reporter.message(f'\n[!] {len(errors)} path(s) could not be deleted:')
+                for path, e in sorted(errors, key=lambda err: err[0]):
+                    _reporter.error(path, e)
+        _reporter.message('\nDone!')
+    return not errors
+
+def pack_dir(src:str|Path, archive:str|Path, include:str=[], exclude:str=[], compression:str='auto', output:str='text', stats:bool=False) -> bool:
+    """Pack a source directory (`src`) into a tar `archive` file, which can be moved as one big sequential 
+    stream instead of lots of small files (see `unpack_archive()`). Return True if every path was packed 
+    in full, otherwise False (if any files could not be read, or got smaller while they were).
+
+    The archive is streamed as the directory is walked, so nothing is staged in memory, in a pipeline of 
+    three stages: a reader thread walks and reads the files, the current thread makes the tar stream and 
+    compresses it, and a writer thread writes it to the archive (see `_pack_read()`, `_pack_compress()`, 
+    and `_pack_write()`). Only up to `_PIPELINE_DEPTH` chunks are waiting between each stage at once.
+    - `include` and `exclude`: lists of glob patterns to filter the paths (see `copy_move_dir()`).
+    - `compression`: can be 'none', 'gzip', 'zstd' (needs the "zstandard" package), or 'auto' to choose 
+    it from the archive's file extension (see `_get_compression()`).
+    - `output` and `stats`: how everything is output, and whether to print a summary of the metrics.
+    """
+    src, archive = Path(src), Path(archive)                             # make each path string into a Path object
+    assert src.is_dir(), f'"{src}" is not an existing directory'
+    compression = _get_compression(archive, compression)
+    with _reporting('pack', output, stats):
+        _reporter.message(f'\nPacking all files and directories from "{src}" into "{archive}" ({"no" if compression == "none" else compression} compression):\n')
+        chunks, writes = queue.Queue(_PIPELINE_DEPTH), queue.Queue(_PIPELINE_DEPTH)
+        stop, write_errors, errors = threading.Event(), [], []
+        reader = threading.Thread(target=_pack_read, args=(src, archive, include, exclude, chunks, stop, errors), daemon=True)
+        writer = threading.Thread(target=_pack_write, args=(archive, writes, write_errors), daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            with _reporter.phase('pack'):
+                _pack_compress(src, chunks, writes, write_errors, compression, errors)
+        except BaseException:
+            stop.set()                                                  # stop the reader (emptying the queue so it isn't stuck), then re-raise the error
+            while reader.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            raise
+        finally:
+            writes.put(None)
+            writer.join()
+        if write_errors:
+            raise write_errors[0]
+        _reporter.count('archive_bytes', archive.stat().st_size)
+        _reporter.message(f'\nThe archive is {archive.stat().st_size} bytes.')
+        if errors:
+            _reporter.message(f'\n[!] {len(errors)} file(s) could not be packed in full (see above).')
+        _reporter.message('\nDone!')
+    return not errors
+
+def unpack_archive(archive:str|Path, dst:str|Path, workers:int=None, compression:str='auto', output:str='text', stats:bool=False) -> bool:
+    """Unpack a tar `archive` file (such as one made by `pack_dir()`) into a destination directory (`dst`).
+
+    The archive is read as a stream, and each directory is created and each larger file is written as 
+    soon as it's reached, while smaller files are written by a pool of `workers` threads (or the number 
+    of CPUs if not provided), so lots of small files are created in parallel. Any members which would be 
+    outside of `dst`, or aren't regular files or directories, are skipped, and the modes of all members 
+    are limited by the umask (without any setuid, setgid, or sticky bits). Any members which are skipped 
+    or fail are reported at the end. Return True if every member was unpacked, otherwise False.
+    - `compression`: can be 'none', 'gzip', 'zstd' (needs the "zstandard" package), or 'auto' to 
+    detect it from the first bytes of the archive.
+    - `output` and `stats`: how everything is output, and whether to print a summary of the metrics.
+    """
+    archive, dst = Path(archive), Path(dst)                             # make each path string into a Path object
+    assert archive.is_file(), f'"{archive}" is not an existing file'
+    workers = workers or os.cpu_count() or 1
+    assert workers >= 1, f'"{workers}" is not a valid number of workers, must be at least 1'
+    compression = _get_compression(archive, compression, reading=True)
+    umask = os.umask(0)
+    os.umask(umask)                                                     # the umask can only be read by setting it
+    with _reporting('unpack', output, stats):
+        if not dst.is_dir():
+            _reporter.message(f'\n"{dst}" is not an existing destination directory. Creating it now...')
+            dst.mkdir(parents=True)                                     # check if `dst` is an existing directory, and create it if not
+        _reporter.message(f'\nUnpacking "{archive}" ({"no" if compression == "none" else compression} compression) into "{dst}":\n')
+        dirs, skipped, errors = [], [], []
+        with open(archive, 'rb') as raw, _reporter.phase('unpack'):
+            reader = zstandard.ZstdDecompressor().stream_reader(raw) if compression == 'zstd' else raw
+            with tarfile.open(fileobj=reader, mode='r|gz' if compression == 'gzip' else 'r|') as tar:
+                for item, _, e in _imap_bounded(_write_unpacked_file, _unpack_members(tar, dst, dirs, skipped, errors, 0o777 & ~umask), workers):
+                    if e:
+                        errors.append((item[0], e))
+                        continue
+                    _reporter.path(_get_path_tree_str(item[0], dst, is_dir=False), item[0])
+            # Set the modes and modification times of the directories last (in reverse order, so each one's contents come first), 
+            # as adding anything to them changes them (and their modes may not allow it):
+            for a_path, member in reversed(dirs):
+                try:
+                    os.chmod(a_path, member.mode)
+                    os.utime(a_path, (member.mtime, member.mtime))
+                except OSError as e:
+                    errors.append((a_path, e))
+        if skipped:
+            _reporter.message(f'\n[!] {len(skipped)} member(s) of the archive were skipped:')
+            for name, reason in skipped:
+                _reporter.error(name, reason)
+        if errors:
+            _reporter.message(f'\n[!] {len(errors)} path(s) could not be unpacked:')
+            for a_path, e in sorted(errors, key=lambda err: err[0]):
+                _reporter.error(a_path, e)
+        _reporter.message('\nDone!')
+    return not (skipped or errors)
@@ -1,5 +1,6 @@
 from argparse import ArgumentParser
 import os
+import sys
 import ffuncs as ff
 
 #--------- Argparse Setup ---------#
@@ -14,6 +15,20 @@ main_action_subparsers = parser.add_subparsers(description="The file action to p
 delete_parser = main_action_subparsers.add_parser('delete')
 delete_parser.add_argument('source', help='the source directory to perform the action on', nargs='?', default=os.getcwd())
 delete_parser.add_argument('-nc', '--noconfirm', help="do not ask for confirmation before deletion", action='store_true')
+delete_parser.add_argument('-i', '--include', 
+    help='a "quoted" string of comma-seprated glob patterns which each individual part of the path must match in order to be deleted.'
+)
+delete_parser.add_argument('-e', '--exclude', 
+    help='a "quoted" string of comma-seprated glob patterns which each individual part of the path must NOT match in order to be deleted.'
+)
+delete_parser.add_argument('-j', '--jobs', help='the number of threads to delete with', type=int, default=1)
+delete_parser.add_argument('-b', '--background', 
+    help='instantly rename the path to a hidden one, then delete it with a background process', 
+    action='store_true'
+)
+delete_parser.add_argument('-q', '--quiet', help='only show a progress bar instead of printing each path', action='store_true')
+delete_parser.add_argument('--json', help='output everything as NDJSON (one JSON event per line), ending with a summary', action='store_true')
+delete_parser.add_argument('--stats', help='print the time spent in each phase, counts, throughput, and the slowest files at the end', action='store_true')
 
 # List subcommand (root parent for other commands):
 list_parser = main_action_subparsers.add_parser('list')
@@ -24,20 +39,74 @@ list_parser.add_argument('-i', '--include',
 list_parser.add_argument('-e', '--exclude', 
     help='a "quoted" string of comma-seprated glob patterns which each individual part of the path must NOT match in order to be included.'
 )
+list_parser.add_argument('-q', '--quiet', help='only show a progress bar instead of printing each path', action='store_true')
+list_parser.add_argument('--json', help='output everything as NDJSON (one JSON event per line), ending with a summary', action='store_true')
+list_parser.add_argument('--stats', help='print the time spent in each phase, counts, throughput, and the slowest files at the end', action='store_true')
 
 # Copy subcommand (borrows args from List command):
 copy_parser = main_action_subparsers.add_parser('copy', parents=[list_parser], add_help=False)
     # `add_help=False` must be added to all parsers which use parents
 copy_parser.add_argument('destination', help='the destination directory that the source contents should be copied/moved to')
 copy_parser.add_argument('-x', '--exists', 
-    help='the action to perform if paths in the destination already exists', 
-    choices=['ask', 'rename', 'replace', 'skip'],
-    default='ask'
+    help='the action to perform if paths in the destination already exists (default is "ask", or "update" for sync)', 
+    choices=['ask', 'rename', 'replace', 'skip', 'update'],
+)
+copy_parser.add_argument('-j', '--jobs', 
+    help='the number of files to copy/move at the same time (in parallel)', 
+    type=int,
+    default=1
 )
+copy_parser.add_argument('-c', '--copy-mode', 
+    help='how the file data is copied: "reflink" (only on copy-on-write filesystems), "kernel" (zero-copy), "buffered", or "auto" to use the fastest one that works', 
+    choices=['auto', 'reflink', 'kernel', 'buffered'],
+    default='auto'
+)
+
+copy_parser.add_argument('--verify', help='compare the hashes of all copied/moved files with their sources once done', action='store_true')
+copy_parser.add_argument('-n', '--dry-run', help='only show what would be copied/moved (and renamed), without changing anything', action='store_true')
+copy_parser.add_argument('--resume', help='resume the unfinished job from the source to the destination, without walking the source again', action='store_true')
 
 # Move subcommand (borrows args from Copy command):
 move_parser = main_action_subparsers.add_parser('move', parents=[copy_parser], add_help=False)
 
+# Sync subcommand (borrows args from Copy command, but only copies new or changed files by default):
+sync_parser = main_action_subparsers.add_parser('sync', parents=[copy_parser], add_help=False)
+sync_parser.add_argument('--checksum', help="also compare the hashes of files to determine if they're unchanged (slower)", action='store_true')
+
+
+# Verify subcommand (borrows args from List command):
+verify_parser = main_action_subparsers.add_parser('verify', parents=[list_parser], add_help=False)
+verify_parser.add_argument('destination', help='the destination directory that should have identical copies of the source files')
+verify_parser.add_argument('-j', '--jobs', help='the number of files to hash at the same time (default is the number of CPUs)', type=int)
+verify_parser.add_argument('-a', '--algorithm', help='the hash algorithm to use', default='sha256')
+
+# Pack subcommand (borrows args from List command):
+pack_parser = main_action_subparsers.add_parser('pack', parents=[list_parser], add_help=False)
+pack_parser.add_argument('archive', help='the path of the tar archive file to pack the source contents into')
+pack_parser.add_argument('-z', '--compression', 
+    help='how the archive is compressed (zstd needs the "zstandard" package), or "auto" to choose it from the file extension (.tar.gz, .tar.zst)', 
+    choices=['auto', 'none', 'gzip', 'zstd'],
+    default='auto'
+)
+
+# Unpack subcommand:
+unpack_parser = main_action_subparsers.add_parser('unpack')
+unpack_parser.add_argument('archive', help='the path of the tar archive file to unpack')
+unpack_parser.add_argument('destination', help='the destination directory that the archive contents should be unpacked into', nargs='?', default=os.getcwd())
+unpack_parser.add_argument('-j', '--jobs', help='the number of files to write at the same time (default is the number of CPUs)', type=int)
+unpack_parser.add_argument('-z', '--compression', 
+    help='how the archive is compressed, or "auto" to detect it', 
+    choices=['auto', 'none', 'gzip', 'zstd'],
+    default='auto'
+)
+unpack_parser.add_argument('-q', '--quiet', help='only show a progress bar instead of printing each path', action='store_true')
+unpack_parser.add_argument('--json', help='output everything as NDJSON (one JSON event per line), ending with a summary', action='store_true')
+unpack_parser.add_argument('--stats', help='print the time spent in each phase, counts, throughput, and the slowest files at the end', action='store_true')
+
+# List-only args (added after the other parsers borrow the List args, so only the List command has them):
+list_parser.add_argument('-d', '--dupes', help='only list groups of files with identical contents', action='store_true')
+list_parser.add_argument('-a', '--algorithm', help='the hash algorithm to use to find duplicate files', default='sha256')
+
 
 #--------- Main Execution ---------#
 
@@ -45,7 +114,11 @@ command_map = {
     'list':     ff.display_dir,
     'copy':     ff.copy_move_dir,
     'move':     ff.copy_move_dir,
+    'sync':     ff.copy_move_dir,
+    'verify':   ff.verify_dirs,
     'delete':   ff.permanent_delete,
+    'pack':     ff.pack_dir,
+    'unpack':   ff.unpack_archive,
 }
 
 if __name__ == "__main__":
@@ -54,13 +127,30 @@ if __name__ == "__main__":
     # by commas into a list, and remove extra whitespace from each value:
     include = [s.strip() for s in (args.include).split(',')] if (hasattr(args, 'include') and args.include) else []
     exclude = [s.strip() for s in (args.exclude).split(',')] if (hasattr(args, 'exclude') and args.exclude) else []
-    # Apply args to function according to 'command':
+    output = 'json' if getattr(args, 'json', False) else 'quiet' if getattr(args, 'quiet', False) else 'text'  # (neither is set if no command was given)
+    # The default exists action depends on the command (which can't be set with `set_defaults()` on the Sync 
+    # parser, as the argument's action is shared with the Copy and Move parsers, so it would change theirs too):
+    if hasattr(args, 'exists') and not args.exists:
+        args.exists = 'update' if args.command == 'sync' else 'ask'
+    # Apply args to function according to 'command' (`succeeded` is set to False by commands which can fail):
+    succeeded = True
     if args.command == 'list':
-        ff.display_dir(args.source, include, exclude)
+        ff.display_dir(args.source, include, exclude, args.dupes, args.algorithm, output=output, stats=args.stats)
     elif args.command == 'copy':
-        ff.copy_move_dir(args.source, args.destination, False, include, exclude, args.exists)
+        succeeded = ff.copy_move_dir(args.source, args.destination, False, include, exclude, args.exists, args.jobs, args.copy_mode, verify=args.verify, dry_run=args.dry_run, resume=args.resume, output=output, stats=args.stats)
     elif args.command == 'move':
-        ff.copy_move_dir(args.source, args.destination, True, include, exclude, args.exists)
+        succeeded = ff.copy_move_dir(args.source, args.destination, True, include, exclude, args.exists, args.jobs, args.copy_mode, verify=args.verify, dry_run=args.dry_run, resume=args.resume, output=output, stats=args.stats)
+    elif args.command == 'sync':
+        succeeded = ff.copy_move_dir(args.source, args.destination, False, include, exclude, args.exists, args.jobs, args.copy_mode, args.checksum, args.verify, args.dry_run, args.resume, output, args.stats)
+    elif args.command == 'verify':
+        succeeded = ff.verify_dirs(args.source, args.destination, include, exclude, args.algorithm, args.jobs, output, args.stats)
     elif args.command == 'delete':
-        ff.permanent_delete(args.source, not args.noconfirm)    # 'noconfirm' must be bool reversed for the function
-    print()
+        succeeded = ff.permanent_delete(args.source, not args.noconfirm, include, exclude, args.jobs, args.background, output, args.stats)  # 'noconfirm' must be bool reversed for the function
+    elif args.command == 'pack':
+        succeeded = ff.pack_dir(args.source, args.archive, include, exclude, args.compression, output, args.stats)
+    elif args.command == 'unpack':
+        succeeded = ff.unpack_archive(args.archive, args.destination, args.jobs, args.compression, output, args.stats)
+    if output != 'json':
+        print()
+    if not succeeded:
+        sys.exit(1)                                                     # exit with an error if any files failed or don't match (such as for schedulers)
@@ -0,0 +1,217 @@
+"""Benchmarks for the main file functions in `file_tools/ffuncs.py`.
+
+Reproducible synthetic directory trees are generated for each profile (see `PROFILES`), then
+the `list`, `copy`, `move`, and `delete` operations are timed on each of them, both end to end
+and per phase (such as walk, match, copy, and delete, as recorded by each operation itself).
+The results are saved as JSON, and can be compared with the results from another commit to
+find any regressions.
+
+Example usage:
+    python tests/benchmark.py --out before.json
+    python tests/benchmark.py --out after.json --compare before.json --threshold 0.1
+"""
+
+from argparse import ArgumentParser
+import contextlib
+import io
+import json
+from pathlib import Path
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'file_tools'))
+import ffuncs as ff
+
+
+#--------- Synthetic Tree Generators ---------#
+
+def _write_file(a_path:Path, size:int, rng:random.Random):
+    """Write a file of `size` random (but reproducible) bytes."""
+    with open(a_path, 'wb') as f:
+        chunk = rng.randbytes(min(size, 1024**2))                       # repeat a single chunk for larger files, as generating random bytes is slow
+        while size > 0:
+            f.write(chunk[:size])
+            size -= len(chunk)
+
+def gen_many_tiny(root:Path, scale:float, rng:random.Random):
+    """Many tiny files (0 - 512 bytes), 100 per directory, two levels deep."""
+    n_files = int(20000 * scale)
+    for i in range(n_files):
+        a_dir = root / f'd{i // 1000:03}' / f'd{(i // 100) % 10}'
+        a_dir.mkdir(parents=True, exist_ok=True)
+        _write_file(a_dir / f'f{i:06}.txt', rng.randint(0, 512), rng)
+
+def gen_few_huge(root:Path, scale:float, rng:random.Random):
+    """A few huge files (32 MiB each), and a handful of small ones next to them."""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(max(1, int(4 * scale))):
+        _write_file(root / f'huge{i}.bin', 32 * 1024**2, rng)
+    for i in range(10):
+        _write_file(root / f'small{i}.txt', rng.randint(0, 4096), rng)
+
+def gen_deep(root:Path, scale:float, rng:random.Random):
+    """Very deeply nested directories (chains of 200 levels), with a file at every level."""
+    for chain in range(max(1, int(20 * scale))):
+        a_dir = root / f'chain{chain:02}'
+        for depth in range(200):
+            a_dir.mkdir(parents=True, exist_ok=True)
+            _write_file(a_dir / f'f{depth}.txt', rng.randint(0, 256), rng)
+            a_dir = a_dir / 'd'
+
+def gen_wide(root:Path, scale:float, rng:random.Random):
+    """A single wide, flat directory with lots of files in it."""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(int(20000 * scale)):
+        _write_file(root / f'f{i:06}.dat', rng.randint(0, 1024), rng)
+
+def gen_heavy_exclude(root:Path, scale:float, rng:random.Random):
+    """A project-like tree where about 90% of all files are in excluded ("node_modules" and ".git") directories."""
+    for project in range(max(1, int(20 * scale))):
+        project_dir = root / f'project{project:02}'
+        for i in range(50):
+            src_dir = project_dir / 'src' / f'pkg{i % 5}'
+            src_dir.mkdir(parents=True, exist_ok=True)
+            _write_file(src_dir / f'mod{i}.py', rng.randint(0, 2048), rng)
+        for i in range(400):
+            dep_dir = project_dir / 'node_modules' / f'dep{i // 20}' / 'lib'
+            dep_dir.mkdir(parents=True, exist_ok=True)
+            _write_file(dep_dir / f'index{i}.js', rng.randint(0, 2048), rng)
+        for i in range(50):
+            git_dir = project_dir / '.git' / 'objects' / f'{i:02x}'
+            git_dir.mkdir(parents=True, exist_ok=True)
+            _write_file(git_dir / f'obj{i}', rng.randint(0, 1024), rng)
+
+# Each profile's tree generator, and the `exclude` patterns to use with it:
+PROFILES = {
+    'many_tiny':        (gen_many_tiny, []),
+    'few_huge':         (gen_few_huge, []),
+    'deep':             (gen_deep, []),
+    'wide':             (gen_wide, []),
+    'heavy_exclude':    (gen_heavy_exclude, ['node_modules', '.git']),
+}
+
+
+#--------- Timing ---------#
+
+def _timed(times:dict, func, *args, **kwargs):
+    """Call `func` with NDJSON output (which is captured, so terminal output doesn't dominate), and add 
+    how long it took in seconds, and how long each phase took (from the summary event at the end of its 
+    output, see `ff._Reporter`), to the lists of times for each phase in the `times` dict."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        start = time.perf_counter()
+        func(*args, output='json', **kwargs)
+        total = time.perf_counter() - start
+    summary = json.loads(output.getvalue().splitlines()[-1])
+    assert summary['event'] == 'summary', f'the output of "{func.__name__}" did not end with a summary'
+    for phase, seconds in {**summary['phases'], 'total': total}.items():
+        times.setdefault(phase, []).append(seconds)
+
+def bench_profile(tree:Path, work_dir:Path, exclude:list, repeat:int, jobs:int) -> dict:
+    """Time each operation on the generated `tree` `repeat` times (using `work_dir` for any copies), and
+    return a dict of each operation, with a dict of each phase and the lists of times for it."""
+    times = {'list': {}, 'copy': {}, 'move': {}, 'delete': {}}
+    for _ in range(repeat):
+        _timed(times['list'], ff.display_dir, tree, exclude=exclude)
+        dst = work_dir / 'copy'
+        _timed(times['copy'], ff.copy_move_dir, tree, dst, False, exclude=exclude, dst_path_exists='replace', workers=jobs)
+        # move (the copy is moved, so the generated tree is left as is):
+        moved = work_dir / 'moved'
+        _timed(times['move'], ff.copy_move_dir, dst, moved, True, dst_path_exists='replace', workers=jobs)
+        shutil.rmtree(dst)
+        # delete (the moved copy):
+        _timed(times['delete'], ff.permanent_delete, moved, confirm=False, workers=jobs)
+    return times
+
+def _summary(times:list[float]) -> dict:
+    return {'min': min(times), 'median': statistics.median(times), 'runs': times}
+
+def _git_commit() -> str|None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(profiles:list[str], scale:float=1.0, repeat:int=3, jobs:int=1, seed:int=0, tmp_dir:str=None) -> dict:
+    """Generate the tree for each of the `profiles` (with the number of files multiplied by `scale`, and
+    the random `seed`) in a temporary directory, benchmark it, and return a dict of all the results."""
+    results = {
+        'meta': {'commit': _git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                 'scale': scale, 'repeat': repeat, 'jobs': jobs, 'seed': seed},
+        'results': {},
+    }
+    for name in profiles:
+        gen_func, exclude = PROFILES[name]
+        with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+            tree, work_dir = Path(tmp) / 'tree', Path(tmp) / 'work'
+            work_dir.mkdir()
+            print(f'Generating "{name}" tree...')
+            gen_func(tree, scale, random.Random(seed))
+            print(f'Benchmarking "{name}"...')
+            times = bench_profile(tree, work_dir, exclude, repeat, jobs)
+        results['results'][name] = {op: {phase: _summary(t) for phase, t in phases.items()} for op, phases in times.items()}
+        for op, phases in results['results'][name].items():
+            print('    ' + f'{op:<8}' + '  '.join(f'{phase}: {summary["min"]:.3f}s' for phase, summary in phases.items()))
+    return results
+
+
+#--------- Comparison ---------#
+
+def compare_results(new:dict, old:dict, threshold:float=0.1) -> list[tuple[str, float, float]]:
+    """Compare the minimum times of each profile, operation, and phase in both the `new` and `old` results,
+    print them, and return a list of tuples of the name, old time, and new time for each one which is more
+    than `threshold` (a fraction) slower."""
+    regressions = []
+    print(f'\nComparing with commit {old["meta"].get("commit")}:')
+    for profile, ops in new['results'].items():
+        for op, phases in ops.items():
+            for phase, summary in phases.items():
+                try:
+                    old_time = old['results'][profile][op][phase]['min']
+                except KeyError:
+                    continue                                            # skip anything that wasn't benchmarked before
+                new_time = summary['min']
+                change = (new_time - old_time) / old_time if old_time else 0.0
+                name = f'{profile}.{op}.{phase}'
+                flag = ''
+                if change > threshold:
+                    flag = '  [!] REGRESSION'
+                    regressions.append((name, old_time, new_time))
+                print(f'    {name:<32} {old_time:8.3f}s -> {new_time:8.3f}s  ({change:+.1%}){flag}')
+    return regressions
+
+
+#--------- Main Execution ---------#
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark the file operations on synthetic directory trees")
+    parser.add_argument('-p', '--profiles', help='a comma-separated list of the profiles to run', default=','.join(PROFILES))
+    parser.add_argument('-s', '--scale', help='a multiplier for the number of files in each tree', type=float, default=1.0)
+    parser.add_argument('-r', '--repeat', help='the number of times to run each benchmark', type=int, default=3)
+    parser.add_argument('-j', '--jobs', help='the number of workers for copy/move/delete', type=int, default=1)
+    parser.add_argument('--seed', help='the random seed for generating the trees', type=int, default=0)
+    parser.add_argument('--tmp', help='the directory to generate the trees in (default is the system temp directory)')
+    parser.add_argument('-o', '--out', help='the path of the JSON file to save the results to')
+    parser.add_argument('-c', '--compare', help='the path of a JSON results file to compare the results with')
+    parser.add_argument('-t', '--threshold', help='the fraction slower than the compared results that counts as a regression', type=float, default=0.1)
+    args = parser.parse_args()
+
+    profiles = [s.strip() for s in args.profiles.split(',')]
+    for name in profiles:
+        assert name in PROFILES, f'"{name}" is not a valid profile. Must be one of: {tuple(PROFILES)}'
+    results = run_benchmarks(profiles, args.scale, args.repeat, args.jobs, args.seed, args.tmp)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f'\nSaved results to "{args.out}"')
+    if args.compare:
+        regressions = compare_results(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f'\n[!] {len(regressions)} regression(s) of more than {args.threshold:.0%}')
+            sys.exit(1)
+        print('\nNo regressions.')
@@ -0,0 +1,405 @@
+"""Behaviour tests for the main file functions in `file_tools/ffuncs.py`.
+
+Each test builds a small directory tree in a temporary directory and runs the functions on it.
+
+Example usage:
+    python -m unittest tests/tests.py
+"""
+
+import contextlib
+import errno
+import io
+import os
+import random
+import shutil
+from pathlib import Path
+import sys
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'file_tools'))
+import ffuncs as ff
+
+
+def _make_tree(root:Path, files:dict[str, str]):
+    """Create each file in `files` (a dict of relative paths and their text) under `root`."""
+    for rel_path, text in files.items():
+        a_path = root / rel_path
+        a_path.parent.mkdir(parents=True, exist_ok=True)
+        a_path.write_text(text)
+
+def _read_tree(root:Path) -> dict[str, str]:
+    """Return a dict of the relative path and text of each file under `root` (ignoring any manifest)."""
+    return {p.relative_to(root).as_posix(): p.read_text() for p in root.rglob('*') if p.is_file() and p.name != ff._MANIFEST_NAME}
+
+def _quiet(func, *args, **kwargs):
+    """Call `func` with its stdout discarded, and return its result."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+class FileToolsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.src, self.dst = self.tmp / 'src', self.tmp / 'dst'
+
+
+class WalkTest(FileToolsTest):
+    def test_destination_within_relative_source(self):
+        files = {'a/x.py': 'x', 'z.txt': 'z'}
+        _make_tree(self.src, files)
+        cwd = os.getcwd()
+        os.chdir(self.src)
+        self.addCleanup(os.chdir, cwd)
+        # the destination (and its manifest) is never walked, even with a source of '.', so it isn't nested in itself:
+        for _ in range(2):
+            _quiet(ff.copy_move_dir, '.', './backup', dst_path_exists='update')
+        self.assertEqual(_read_tree(self.src / 'backup'), files)
+        self.assertEqual(sorted(p.name for p in (self.src / 'backup').iterdir()), [ff._MANIFEST_NAME, 'a', 'z.txt'])
+        _quiet(ff.copy_move_dir, '.', 'sub')
+        self.assertEqual(_read_tree(self.src / 'sub'), {**files, **{f'backup/{k}': v for k, v in files.items()}})
+
+
+class MatchTest(FileToolsTest):
+    PATTERNS = [([], []), (['*.py'], []), ([], ['node_modules', '.git']), (['*.py', 'test_*'], ['node_modules']),
+                (['[ab]*'], ['*.txt']), (['?'], ['a/b']), (['a/b'], []), (['*'], ['*'])]
+
+    def _old_parts_valid(self, rel_path:Path, include:list, exclude:list) -> bool:
+        """The original (uncompiled) way that paths were checked with `Path.match()`."""
+        if any(Path(part).match(pattern) for part in rel_path.parts for pattern in exclude):
+            return False
+        return (not include) or any(Path(part).match(pattern) for part in rel_path.parts for pattern in include)
+
+    def _make_random_tree(self, rng:random.Random):
+        names = ['a', 'b', 'b.py', 'c.txt', 'node_modules', '.git', 'test_x.py', 'x']
+        shutil.rmtree(self.src, ignore_errors=True)
+        self.src.mkdir()
+        dirs = [self.src]
+        for _ in range(60):
+            parent = rng.choice(dirs)
+            a_path = parent / rng.choice(names)
+            if a_path.exists() or len(a_path.relative_to(self.src).parts) > 5:
+                continue
+            if rng.random() < 0.5:
+                a_path.mkdir()
+                dirs.append(a_path)
+            else:
+                a_path.write_text('')
+
+    def test_matcher_matches_path_match(self):
+        parts = ['a', 'b.py', 'c.txt', 'node_modules', '.git', 'test_x.py', 'x', 'A.PY']
+        rng = random.Random(0)
+        for include, exclude in self.PATTERNS:
+            matcher = ff._PathMatcher(include, exclude)
+            for _ in range(200):
+                rel_path = Path(*rng.choices(parts, k=rng.randint(1, 4)))
+                self.assertEqual(matcher.parts_valid(rel_path.parts), self._old_parts_valid(rel_path, include, exclude), (rel_path, include, exclude))
+
+    def test_walk_matches_rglob(self):
+        rng = random.Random(0)
+        for i in range(20):
+            self._make_random_tree(rng)
+            for include, exclude in self.PATTERNS:
+                with self.subTest(tree=i, include=include, exclude=exclude):
+                    # the original walk: every file and empty directory from `rglob()` which is valid:
+                    expected = sorted(p for p in self.src.rglob('*') if (p.is_file() or (p.is_dir() and not any(p.iterdir())))
+                                      and self._old_parts_valid(p.relative_to(self.src), include, exclude))
+                    entries = [(Path(entry.path), entry.is_dir(follow_symlinks=False)) for entry in ff._walk_entries(self.src, ff._PathMatcher(include, exclude))]
+                    self.assertEqual([p for p, _ in entries], sorted(p for p, _ in entries))   # in sorted order
+                    self.assertEqual([p for p, is_dir in entries if not (is_dir and any(p.iterdir()))], expected)
+                    # and every non-empty directory which is yielded contains a valid path:
+                    for p, is_dir in entries:
+                        if is_dir and any(p.iterdir()):
+                            self.assertTrue(any(e.is_relative_to(p) for e in expected), p)
+
+    def test_excluded_dirs_are_never_scanned(self):
+        _make_tree(self.src, {'node_modules/a/x.py': 'x', 'a/node_modules/y.py': 'y', 'a/z.py': 'z'})
+        with mock.patch.object(ff, '_sorted_scandir', wraps=ff._sorted_scandir) as scandir:
+            paths = [Path(entry.path) for entry in ff._walk_entries(self.src, ff._PathMatcher(exclude=['node_modules']))]
+        self.assertEqual(paths, [self.src / 'a', self.src / 'a/z.py'])
+        scanned = [Path(call.args[0]) for call in scandir.call_args_list]
+        self.assertEqual(scanned, [self.src, self.src / 'a'])
+        self.assertFalse(any('node_modules' in p.parts for p in scanned))
+
+
+class CopyModeTest(FileToolsTest):
+    def setUp(self):
+        super().setUp()
+        self.src.mkdir()
+        self.dst.mkdir()
+        self.data = random.Random(0).randbytes(10_000)
+        (self.src / 'f.bin').write_bytes(self.data)
+        (self.src / 'f.bin').chmod(0o750)
+        self.reflink_supported = self._reflink_supported()
+
+    def _reflink_supported(self) -> bool:
+        with open(self.src / 'f.bin', 'rb') as src_f, open(self.tmp / 'probe', 'wb') as dst_f:
+            return ff._reflink_data(src_f.fileno(), dst_f.fileno(), len(self.data))
+
+    def _assert_copied(self, dst_path:Path):
+        self.assertEqual(dst_path.read_bytes(), self.data)
+        self.assertEqual(dst_path.stat().st_mode & 0o7777, 0o750)
+        self.assertFalse(dst_path.with_name(dst_path.name + ff._TEMP_SUFFIX).exists())
+
+    def test_copy_modes(self):
+        modes = {'auto': 'reflink' if self.reflink_supported else 'kernel', 'kernel': 'kernel', 'buffered': 'buffered'}
+        if self.reflink_supported:
+            modes['reflink'] = 'reflink'
+        with mock.patch.object(ff, '_COPY_BUFFER_SIZE', 1000):         # so the data is copied in several chunks
+            for copy_mode, method in modes.items():
+                with self.subTest(copy_mode=copy_mode):
+                    dst_path = self.dst / f'{copy_mode}.bin'
+                    self.assertEqual(ff._copy_file(self.src / 'f.bin', dst_path, copy_mode), method)
+                    self._assert_copied(dst_path)
+
+    def test_kernel_copy_falls_back_to_sendfile(self):
+        def unsupported(*args):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+        for copy_file_range in (None, unsupported):
+            with self.subTest(copy_file_range=copy_file_range), mock.patch.object(ff, '_copy_file_range', copy_file_range):
+                self.assertEqual(ff._copy_file(self.src / 'f.bin', self.dst / 'f.bin', 'kernel'), 'kernel')
+                self._assert_copied(self.dst / 'f.bin')
+                (self.dst / 'f.bin').unlink()
+
+    def test_unsupported_copy_mode_gives_per_file_errors(self):
+        if self.reflink_supported:
+            self.skipTest('reflinks are supported by this filesystem')
+        with self.assertRaises(OSError):
+            ff._copy_file(self.src / 'f.bin', self.dst / 'f.bin', 'reflink')
+        self.assertEqual(list(self.dst.iterdir()), [])                  # no temporary file is left behind
+        _make_tree(self.src, {'a/x.txt': 'x', 'y.txt': 'y'})
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    self.assertFalse(ff.copy_move_dir(self.src, self.dst, copy_mode='reflink', workers=workers))
+                self.assertIn('3 file(s) could not be copied', out.getvalue())
+                self.assertEqual(list(_read_tree(self.dst)), [ff._JOURNAL_NAME])   # only the journal is left, so the job can be resumed
+                shutil.rmtree(self.dst)
+
+
+class SyncTest(FileToolsTest):
+    def test_sync_skips_unchanged_and_recopies_changed(self):
+        files = {'a/x.py': 'x', 'a/y.py': 'y', 'z.txt': 'z'}
+        _make_tree(self.src, files)
+        _quiet(ff.copy_move_dir, self.src, self.dst, dst_path_exists='update')
+        self.assertEqual(_read_tree(self.dst), files)
+        # a changed source file, and a deleted and a changed destination file are all copied again:
+        (self.src / 'a/y.py').write_text('new y')
+        os.utime(self.src / 'a/y.py', ns=(0, 10**18))
+        (self.dst / 'z.txt').unlink()
+        (self.dst / 'a/x.py').write_text('tampered')
+        _quiet(ff.copy_move_dir, self.src, self.dst, dst_path_exists='update')
+        self.assertEqual(_read_tree(self.dst), {**files, 'a/y.py': 'new y'})
+
+    def test_sync_skips_unchanged_files(self):
+        _make_tree(self.src, {'a/x.py': 'x', 'z.txt': 'z'})
+        _quiet(ff.copy_move_dir, self.src, self.dst, dst_path_exists='update')
+        manifest = ff._SyncManifest(self.dst)
+        try:
+            self.assertTrue(manifest.is_unchanged(self.src / 'a/x.py', self.dst / 'a/x.py'))
+            self.assertTrue(manifest.is_unchanged(self.src / 'z.txt', self.dst / 'z.txt'))
+        finally:
+            manifest.close()
+
+
+class RenameTest(FileToolsTest):
+    def test_renamed_path_numbering(self):
+        taken = {'a(1).txt', 'b(12).txt', 'b(13).txt'}
+        self.assertEqual(ff._get_renamed_path(Path('d/a.txt'), taken), Path('d/a(2).txt'))
+        self.assertEqual(ff._get_renamed_path(Path('d/a.txt'), taken), Path('d/a(3).txt'))   # the new names are taken too
+        self.assertEqual(ff._get_renamed_path(Path('d/b(12).txt'), taken), Path('d/b(14).txt'))
+        self.assertEqual(ff._get_renamed_path(Path('d/c(99)'), taken), Path('d/c(100)'))
+
+    def test_rename_against_existing_and_planned_names(self):
+        _make_tree(self.src, {'d/a.txt': 'new a', 'd/a(1).txt': 'new a1', 'd/b(12).txt': 'new b12', 'd/c.txt': 'c'})
+        _make_tree(self.dst, {'d/a.txt': 'a', 'd/a(2).txt': 'a2', 'd/b(12).txt': 'b12', 'd/b(13).txt': 'b13'})
+        _quiet(ff.copy_move_dir, self.src, self.dst, dst_path_exists='rename')
+        self.assertEqual(_read_tree(self.dst), {
+            'd/a.txt': 'a', 'd/a(2).txt': 'a2', 'd/b(12).txt': 'b12', 'd/b(13).txt': 'b13',   # existing files are kept
+            'd/a(1).txt': 'new a1',                                     # not existing, so it isn't renamed
+            'd/a(3).txt': 'new a',                                      # (1) is planned, and (2) exists
+            'd/b(14).txt': 'new b12',                                   # the two-digit number is incremented, skipping (13)
+            'd/c.txt': 'c',
+        })
+
+
+class DeleteTest(FileToolsTest):
+    def _make_delete_tree(self):
+        """Create a tree under `src` which is wide and deep enough to be split up between several workers."""
+        shutil.rmtree(self.src, ignore_errors=True)
+        files = {f'd{i}/e{j}/f{k}/{name}': name for i in range(4) for j in range(4) for k in range(2) for name in ('x.py', 'y.txt')[:(i % 3) + 1]}
+        _make_tree(self.src, files | {'keep.py': 'k', 'd0/keep/x.py': 'k', 'node_modules/x.py': 'n', 'top.py': 't'})
+        for empty in ('empty', 'd1/empty.py'):
+            (self.src / empty).mkdir()
+
+    def _all_paths(self, root:Path) -> set[str]:
+        return {p.relative_to(root).as_posix() for p in root.rglob('*')}
+
+    def test_filtered_delete_matches_list(self):
+        include, exclude = ['*.py'], ['keep*', 'node_modules']
+        for workers in (1, 3, 16):
+            with self.subTest(workers=workers):
+                self._make_delete_tree()
+                before = self._all_paths(self.src)
+                listed = {p.relative_to(self.src).as_posix() for p, _, _ in _quiet(list, ff._get_paths(self.src, include=include, exclude=exclude))}
+                # every listed file and originally empty directory is deleted, along with any directories left empty:
+                deleted = {p for p in listed if (self.src / p).is_file() or not any((self.src / p).iterdir())}
+                kept = before - deleted
+                for d in sorted(listed, key=lambda p: -p.count('/')):      # (from the bottom up)
+                    if not any(p.startswith(d + '/') for p in kept):
+                        kept.discard(d)
+                self.assertTrue(_quiet(ff.permanent_delete, self.src, confirm=False, include=include, exclude=exclude, workers=workers))
+                self.assertTrue(self.src.is_dir())                      # the root is kept
+                self.assertEqual(self._all_paths(self.src), kept)
+                self.assertIn('keep.py', kept)
+                self.assertIn('d0/keep/x.py', kept)
+                self.assertIn('node_modules/x.py', kept)
+                self.assertIn('empty', kept)
+                self.assertNotIn('d1/empty.py', kept)
+                self.assertNotIn('d3/e0', kept)                         # everything in it was deleted
+
+    def test_delete_all_in_parallel(self):
+        # the top levels are split up into more subtrees for more workers (6 top level directories, 
+        # then 18 on the second level, then 32 on the third, which is as deep as it's split):
+        for workers, n_subtrees in ((1, 6), (3, 18), (16, 32)):
+            with self.subTest(workers=workers):
+                self._make_delete_tree()
+                with mock.patch.object(ff, '_delete_tree_fd', wraps=ff._delete_tree_fd) as delete_tree:
+                    self.assertTrue(_quiet(ff.permanent_delete, self.src, confirm=False, workers=workers))
+                self.assertEqual(delete_tree.call_count, n_subtrees)
+                self.assertFalse(self.src.exists())
+
+    def test_symlinks_not_followed(self):
+        outside = self.tmp / 'outside'
+        _make_tree(outside, {'a/x.py': 'x', 'y.py': 'y'})
+        for workers, include in ((1, []), (4, []), (1, ['*']), (4, ['*'])):
+            with self.subTest(workers=workers, include=include):
+                _make_tree(self.src, {'d/z.py': 'z'})
+                (self.src / 'dir_link').symlink_to(outside / 'a', target_is_directory=True)
+                (self.src / 'd/file_link.py').symlink_to(outside / 'y.py')
+                self.assertTrue(_quiet(ff.permanent_delete, self.src, confirm=False, include=include, workers=workers))
+                self.assertEqual(_read_tree(outside), {'a/x.py': 'x', 'y.py': 'y'})
+                self.assertFalse((self.src / 'dir_link').is_symlink())
+                self.assertFalse((self.src / 'd/file_link.py').is_symlink())
+                shutil.rmtree(self.src, ignore_errors=True)
+        # a symlink to a directory is deleted itself, rather than the directory:
+        (self.tmp / 'root_link').symlink_to(outside, target_is_directory=True)
+        self.assertTrue(_quiet(ff.permanent_delete, self.tmp / 'root_link', confirm=False, workers=4))
+        self.assertFalse((self.tmp / 'root_link').is_symlink())
+        self.assertEqual(_read_tree(outside), {'a/x.py': 'x', 'y.py': 'y'})
+
+    def test_delete_errors_are_reported(self):
+        _make_tree(self.src, {'a/x.py': 'x', 'y.py': 'y'})
+        with mock.patch.object(ff.os, 'unlink', side_effect=PermissionError(13, 'Permission denied')):
+            self.assertFalse(_quiet(ff.permanent_delete, self.src, confirm=False, workers=2))
+        self.assertEqual(_read_tree(self.src), {'a/x.py': 'x', 'y.py': 'y'})
+
+
+class PackTest(FileToolsTest):
+    def setUp(self):
+        super().setUp()
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)                                # (so the unpacked modes are known)
+
+    def test_round_trip(self):
+        files = {'a/x.py': 'x' * 100, 'a/b/y.txt': 'y', 'z.sh': 'z', 'skip.log': 'log'}
+        for compression in ('none', 'gzip'):
+            with self.subTest(compression=compression):
+                shutil.rmtree(self.src, ignore_errors=True)
+                shutil.rmtree(self.dst, ignore_errors=True)
+                _make_tree(self.src, files)
+                (self.src / 'empty').mkdir()
+                (self.src / 'z.sh').chmod(0o755)
+                archive = self.src / 'out.tar'                          # the archive is within the source, so it must not pack itself
+                self.assertTrue(_quiet(ff.pack_dir, self.src, archive, exclude=['*.log'], compression=compression))
+                with mock.patch.object(ff, '_LARGE_FILE_SIZE', 10):      # so larger files are written right away, and the rest in parallel
+                    self.assertTrue(_quiet(ff.unpack_archive, archive, self.dst, workers=4))
+                self.assertEqual(_read_tree(self.dst), {k: v for k, v in files.items() if k != 'skip.log'})
+                self.assertTrue((self.dst / 'empty').is_dir())
+                self.assertEqual((self.dst / 'z.sh').stat().st_mode & 0o7777, 0o755)
+                self.assertAlmostEqual((self.dst / 'a/x.py').stat().st_mtime, (self.src / 'a/x.py').stat().st_mtime, delta=1)
+
+    def test_unreadable_file_fails_pack(self):
+        _make_tree(self.src, {'a.txt': 'a', 'b.txt': 'b'})
+        def failing_open(path, *args, **kwargs):
+            if Path(path).name == 'a.txt':
+                raise PermissionError(13, 'Permission denied')
+            return open(path, *args, **kwargs)
+        with mock.patch.object(ff, 'open', failing_open, create=True):
+            self.assertFalse(_quiet(ff.pack_dir, self.src, self.tmp / 'out.tar'))
+        _quiet(ff.unpack_archive, self.tmp / 'out.tar', self.dst)
+        self.assertEqual(_read_tree(self.dst), {'b.txt': 'b'})
+
+    def _add_member(self, tar, name:str, type=tarfile.REGTYPE, mode:int=0o644, data:bytes=b'', linkname:str=''):
+        info = tarfile.TarInfo(name)
+        info.type, info.mode, info.size, info.linkname = type, mode, len(data), linkname
+        tar.addfile(info, io.BytesIO(data))
+
+    def test_unsafe_members_are_skipped_or_masked(self):
+        archive = self.tmp / 'unsafe.tar'
+        with tarfile.open(archive, 'w') as tar:
+            self._add_member(tar, '.', tarfile.DIRTYPE, 0o755)
+            self._add_member(tar, '../escape.txt', data=b'escape')
+            self._add_member(tar, '/abs.txt', data=b'abs')
+            self._add_member(tar, 'link', tarfile.SYMTYPE, linkname='/etc/passwd')
+            self._add_member(tar, 'open', tarfile.DIRTYPE, 0o1777)
+            self._add_member(tar, 'open/suid', mode=0o6777, data=b'suid')
+            self._add_member(tar, 'ok.txt', data=b'ok')
+        self.assertFalse(_quiet(ff.unpack_archive, archive, self.dst))
+        self.assertEqual(_read_tree(self.dst), {'open/suid': 'suid', 'ok.txt': 'ok'})
+        self.assertFalse((self.tmp / 'escape.txt').exists())
+        self.assertFalse((self.dst / 'link').is_symlink())
+        self.assertEqual((self.dst / 'open').stat().st_mode & 0o7777, 0o755)
+        self.assertEqual((self.dst / 'open/suid').stat().st_mode & 0o7777, 0o755)
+        # an archive of only safe members (and the "." member) is unpacked without any problems:
+        with tarfile.open(archive, 'w') as tar:
+            self._add_member(tar, '.', tarfile.DIRTYPE, 0o755)
+            self._add_member(tar, 'ok.txt', data=b'ok')
+        self.assertTrue(_quiet(ff.unpack_archive, archive, self.tmp / 'safe'))
+        self.assertEqual(_read_tree(self.tmp / 'safe'), {'ok.txt': 'ok'})
+
+
+class ResumeTest(FileToolsTest):
+    def _interrupted_move(self, files:dict[str, str], n_files:int, workers:int=1):
+        """Start moving `src` to `dst`, and interrupt it after `n_files` files are moved."""
+        copy_move_file = ff._copy_move_file
+        def interrupted(*args, **kwargs):
+            if interrupted.n == n_files:
+                raise KeyboardInterrupt
+            interrupted.n += 1
+            return copy_move_file(*args, **kwargs)
+        interrupted.n = 0
+        _make_tree(self.src, files)
+        with mock.patch.object(ff, '_copy_move_file', interrupted), self.assertRaises(KeyboardInterrupt):
+            _quiet(ff.copy_move_dir, self.src, self.dst, move=True, dst_path_exists='replace', workers=workers)
+
+    def test_resume_interrupted_move(self):
+        files = {f'a/f{i}.txt': str(i) for i in range(10)} | {'b/c/z.txt': 'z'}
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                self._interrupted_move(files, 4, workers)
+                self.assertTrue((self.dst / ff._JOURNAL_NAME).is_file())
+                self.assertEqual(len(_read_tree(self.src)), len(files) - 4)
+                # the job is resumed as a move (even if resumed as a copy), without walking the source again:
+                with mock.patch.object(ff, '_get_paths', side_effect=AssertionError('the source was walked again')):
+                    _quiet(ff.copy_move_dir, self.src, self.dst, move=False, resume=True, workers=workers)
+                self.assertEqual(_read_tree(self.dst), files)
+                self.assertEqual(_read_tree(self.src), {})
+                self.assertFalse((self.dst / ff._JOURNAL_NAME).exists())
+                shutil.rmtree(self.src)
+                shutil.rmtree(self.dst)
+
+    def test_resume_without_journal(self):
+        _make_tree(self.src, {'x.txt': 'x'})
+        self.dst.mkdir()
+        with self.assertRaises(AssertionError):
+            _quiet(ff.copy_move_dir, self.src, self.dst, resume=True)
+
+
+if __name__ == '__main__':
+    unittest.main()